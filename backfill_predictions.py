@@ -0,0 +1,66 @@
+# backfill_predictions.py
+import argparse
+import sys
+from datetime import datetime
+
+from core.config import BACKFILL_CONFIG
+from service.backfill import backfill_predictions
+
+
+def parse_bool(value: str) -> bool:
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Re-score historical insurance records with a model version and store the predictions"
+    )
+    parser.add_argument("--model-version", required=True, help="Archived model version (models/versions/<version>.joblib)")
+    parser.add_argument("--model-path", help="Score with this model file instead of the archived version")
+    parser.add_argument("--start-date", type=datetime.fromisoformat, help="Records created at or after (ISO date)")
+    parser.add_argument("--end-date", type=datetime.fromisoformat, help="Records created before (ISO date)")
+    parser.add_argument("--source", help="Only records from this source ('original', 'prediction', ...)")
+    parser.add_argument("--training-data", type=parse_bool, help="Only training (true) or non-training (false) records")
+    parser.add_argument("--workers", type=int, default=BACKFILL_CONFIG['workers'], help="Scoring processes")
+    parser.add_argument("--chunk-size", type=int, default=BACKFILL_CONFIG['chunk_size'])
+    parser.add_argument("--max-rows-per-second", type=float, default=BACKFILL_CONFIG['max_rows_per_second'],
+                        help="Write rate limit (0 for unlimited)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> bool:
+    args = parse_args(argv)
+    filters = {
+        'start_date': args.start_date,
+        'end_date': args.end_date,
+        'source': args.source,
+        'is_training_data': args.training_data
+    }
+
+    def report(state):
+        progress = state.get('progress')
+        percent = f" ({progress:.0%})" if progress is not None else ""
+        print(f"✅ {state['rows_written']:,} predictions written, "
+              f"{state['rows_skipped']:,} already scored{percent}", flush=True)
+
+    print(f"🚀 Backfilling predictions with model version '{args.model_version}'...")
+    state = backfill_predictions(
+        args.model_version, filters,
+        model_path=args.model_path,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        max_rows_per_second=args.max_rows_per_second or None,
+        resume=not args.restart,
+        progress=report
+    )
+    print(f"✅ Backfill completed: {state['rows_written']:,} predictions written")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(0 if main() else 1)
+    except Exception as e:
+        print(f"❌ Backfill failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,132 @@
+# benchmark_sharding.py
+"""
+Write throughput of sharded storage vs shard count
+
+For every shard layout, fresh shard files are created in a temporary
+directory and concurrent writers insert records with their prediction
+results through the sharded write path:
+
+    single  one record + prediction per transaction (POST /predict)
+    batch   bulk inserts split by shard (POST /predict/batch)
+
+Usage:
+    python benchmark_sharding.py [--shards 1 2 4 8] [--region] [--writers 16] [--rows 4000]
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+
+from core.config import STORAGE_CONFIG, TRAINING_CONFIG
+from database.models import Base, InsuranceRecord, PredictionResult
+from database.session import ShardRouter
+from service.prediction import insert_batch_sharded, save_record_with_prediction
+from utils.logger import logger
+
+FEATURES = ['age', 'sex', 'bmi', 'children', 'smoker', 'region']
+
+
+def sample_rows(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    df = pd.read_csv(TRAINING_CONFIG['data_path'])
+    return df.sample(n=n_rows, replace=True, random_state=seed).reset_index(drop=True)
+
+
+def create_router(mode: str, shard_count: int, directory: str) -> ShardRouter:
+    router = ShardRouter({**STORAGE_CONFIG, 'sharding': mode, 'shard_count': shard_count,
+                          'directory': directory}, echo=False)
+    for shard_engine in router.sync_engines():
+        Base.metadata.create_all(shard_engine, tables=[InsuranceRecord.__table__, PredictionResult.__table__])
+        shard_engine.dispose()
+    return router
+
+
+async def run_single(router: ShardRouter, rows: pd.DataFrame, writers: int) -> float:
+    """Rows per second with one record + prediction per transaction"""
+    inputs = [SimpleNamespace(**row, is_training_data=False) for row in rows[FEATURES].to_dict("records")]
+    charges = rows['charges'].tolist()
+
+    async def writer(offset):
+        for position in range(offset, len(inputs), writers):
+            async with router.session(router.route(inputs[position].region)) as db:
+                await save_record_with_prediction(db, inputs[position], charges[position])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(writer(offset) for offset in range(writers)))
+    return len(inputs) / (time.perf_counter() - start)
+
+
+async def run_batch(router: ShardRouter, rows: pd.DataFrame, writers: int, batch_size: int) -> float:
+    """Rows per second with bulk inserts split by shard"""
+    batches = [rows.iloc[start:start + batch_size] for start in range(0, len(rows), batch_size)]
+
+    async def writer(offset):
+        for batch in batches[offset::writers]:
+            await insert_batch_sharded(batch[FEATURES], batch['charges'].to_numpy(), router=router)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(writer(offset) for offset in range(writers)))
+    return len(rows) / (time.perf_counter() - start)
+
+
+async def benchmark(layouts, args) -> pd.DataFrame:
+    single_rows = sample_rows(args.rows)
+    batch_rows = sample_rows(args.rows * args.batch_size // 10, seed=7)
+    results = []
+
+    for mode, shard_count in layouts:
+        label = f"{mode} ({shard_count})"
+        for workload in ('single', 'batch'):
+            with tempfile.TemporaryDirectory() as directory:
+                router = create_router(mode, shard_count, directory)
+                try:
+                    if workload == 'single':
+                        rate = await run_single(router, single_rows, args.writers)
+                    else:
+                        rate = await run_batch(router, batch_rows, args.writers, args.batch_size)
+                finally:
+                    await router.dispose()
+            print(f"✅ {label:<12} {workload:<6} {rate:>12,.0f} rows/s", flush=True)
+            results.append({'layout': label, 'shards': shard_count, 'workload': workload, 'rows_per_second': rate})
+
+    df = pd.DataFrame(results).pivot(index=['layout', 'shards'], columns='workload', values='rows_per_second')
+    baseline = df.xs(1, level='shards').iloc[0] if 1 in df.index.get_level_values('shards') else None
+    if baseline is not None:
+        for workload in ('single', 'batch'):
+            df[f"{workload}_speedup"] = df[workload] / baseline[workload]
+    return df.sort_index(level='shards')
+
+
+def main(argv=None) -> bool:
+    parser = argparse.ArgumentParser(description="Benchmark write throughput against shard count")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8], help="Shard counts ('hash' mode)")
+    parser.add_argument("--region", action="store_true", help="Also benchmark one shard per region")
+    parser.add_argument("--writers", type=int, default=16, help="Concurrent writers")
+    parser.add_argument("--rows", type=int, default=4000, help="Rows written one per transaction")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per batch insert")
+    args = parser.parse_args(argv)
+
+    # Per-row INFO logging would dominate the single-row timings
+    logger.setLevel(logging.WARNING)
+
+    layouts = [('hash', count) for count in args.shards]
+    if args.region:
+        layouts.append(('region', 4))
+
+    print(f"🚀 Benchmarking {len(layouts)} shard layouts with {args.writers} writers...")
+    df = asyncio.run(benchmark(layouts, args))
+    print()
+    print(df.round(2).to_string())
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(0 if main() else 1)
+    except Exception as e:
+        print(f"❌ Benchmark failed: {e}")
+        sys.exit(1)
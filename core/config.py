@@ -12,12 +12,27 @@ MODELS_DIR = os.path.join(BASE_DIR, "models")
 MODEL_PATH = os.path.join(MODELS_DIR, "best_model.joblib")
 PREPROCESSOR_PATH = os.path.join(MODELS_DIR, "preprocessor.joblib")
 METRICS_PATH = os.path.join(MODELS_DIR, "metrics.json")
+MODEL_VERSIONS_DIR = os.path.join(MODELS_DIR, "versions")   # <version>.joblib per promoted model
+DEFAULT_MODEL_VERSION = "1.0"    # tag of a served model that was not promoted by a retrain
 
 # Feature specifications - must match the notebook's preprocessing
 NUMERICAL_FEATURES = ['age', 'bmi', 'children']
 CATEGORICAL_FEATURES = ['sex', 'smoker', 'region'] 
 TARGET_FEATURE = 'charges'
 
+# Input domains - categorical values must also be known to the fitted encoder
+CATEGORY_DOMAINS = {
+    'sex': ['female', 'male'],
+    'smoker': ['no', 'yes'],
+    'region': ['northeast', 'northwest', 'southeast', 'southwest']
+}
+NUMERIC_RANGES = {          # inclusive (min, max)
+    'age': (0, 120),
+    'bmi': (10.0, 100.0),
+    'children': (0, 20)
+}
+INTEGER_FEATURES = ['age', 'children']
+
 # Logging Configuration
 LOG_CONFIG = {
     'name': 'medical_cost_prediction',
@@ -38,3 +53,151 @@ API_CONFIG = {
     'port': 8000,
     'debug': True
 }
+
+# Drift Monitoring Configuration
+# Numeric features are summarised with fixed-width histograms: (low, high, n_bins).
+# Values outside [low, high) fall into dedicated underflow/overflow bins.
+DRIFT_CONFIG = {
+    'numeric_bins': {
+        'age': (18, 66, 12),
+        'bmi': (15, 55, 16),
+        'children': (0, 6, 6),
+        'charges': (0, 65000, 26),
+    },
+    'reference_path': os.path.join(MODELS_DIR, "drift_reference.json"),
+    'checkpoint_path': os.path.join(MODELS_DIR, "drift_live.json"),
+    'checkpoint_every': 500,     # predictions between on-disk checkpoints
+    'psi_threshold': 0.2,        # PSI above this flags a feature as drifted
+    'min_live_samples': 100      # below this the report is marked as insufficient
+}
+
+# CPU Offload Executor Configuration
+# max_queue_depth counts requests waiting behind busy workers; a request is
+# rejected when the queue is full or its estimated wait exceeds max_wait_seconds.
+EXECUTOR_CONFIG = {
+    'inference': {
+        'max_workers': 4,
+        'max_queue_depth': 32,
+        'max_wait_seconds': 2.0,
+        'retry_after_seconds': 1,
+        'rejection_status': 503
+    },
+    'training': {
+        'max_workers': 1,
+        'max_queue_depth': 0,   # one retrain at a time, reject the rest
+        'max_wait_seconds': None,
+        'retry_after_seconds': 30,
+        'rejection_status': 429
+    }
+}
+
+# Prediction Configuration
+PREDICTION_CONFIG = {
+    'max_batch_size': 50000,    # rows accepted by the batch prediction endpoint
+    'max_validation_errors': 1000   # row errors reported for a rejected batch
+}
+
+# Request Profiling Configuration
+# Disabled by default; when disabled the middleware and SQL hooks are not installed.
+# A request is profiled when it carries the header (any value but "0") or is sampled.
+PROFILING_CONFIG = {
+    'enabled': os.getenv('PROFILING_ENABLED', 'false').lower() in ('1', 'true', 'yes'),
+    'header': 'X-Profile',
+    'sample_rate': float(os.getenv('PROFILING_SAMPLE_RATE', '0.0')),
+    'paths': ['/api/v1/predict', '/api/v1/retrain'],  # path prefixes eligible for profiling
+    'directory': Path('profiles'),
+    'max_profiles': 200,    # oldest profiles are deleted beyond this count
+    'max_sql_statements': 200,
+    'top_functions': 25
+}
+
+# Automatic Retraining Configuration
+# A retrain is triggered when enough new training rows arrived since the latest
+# retrain read its training data (the ModelMetadata data watermark), or when the
+# model is older than max_model_age_hours and there is at least one new row. Retrains never start
+# inside the peak window (local hours, [start, end), may wrap past midnight).
+RETRAIN_SCHEDULE_CONFIG = {
+    'enabled': os.getenv('RETRAIN_SCHEDULER_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+    'check_interval_seconds': 300,
+    'min_new_rows': 500,
+    'max_model_age_hours': 24 * 7,
+    'debounce_seconds': 1800,   # minimum gap between two automatic retrains
+    'peak_hours': (8, 20),      # None to allow retraining at any time
+    'max_r2_drop': 0.0,         # promotion tolerance vs the serving model on the same holdout
+    'max_mae_increase': 0.0     # relative, e.g. 0.02 allows 2% higher MAE
+}
+
+# Export Configuration
+EXPORT_CONFIG = {
+    'directory': os.path.join(BASE_DIR, "exports"),
+    'chunk_size': 50000,        # rows per keyset page; each page is its own short read
+    'pause_seconds': 0.01       # pause between pages so writers can take the lock
+}
+
+# Backfill Configuration
+# Re-scoring runs in worker processes; results are written in short
+# transactions capped at max_rows_per_second so live prediction writes
+# keep getting the SQLite write lock.
+BACKFILL_CONFIG = {
+    'directory': os.path.join(BASE_DIR, "backfills"),   # checkpoints
+    'workers': max(1, (os.cpu_count() or 1) - 1),      # scoring processes, one core left for the API
+    'chunk_size': 50000,            # records read and scored per chunk
+    'write_batch_size': 5000,       # rows per write transaction
+    'max_rows_per_second': 20000,   # None for no rate limit
+    'pause_seconds': 0.05,          # pause between write transactions
+    'busy_timeout_seconds': 30      # wait for the write lock instead of failing
+}
+
+# Training Pipeline Configuration
+# Stages of notebook/medical_cost_regression_pipeline.ipynb (see core/training.py).
+# Stage outputs are cached under cache_dir, keyed by a hash of their inputs and
+# the parameters below, so changing one parameter only recomputes the stages
+# downstream of it.
+TRAINING_CONFIG = {
+    'data_path': os.path.join(BASE_DIR, "data", "insurance.csv"),
+    'cache_dir': os.path.join(MODELS_DIR, "cache"),
+    'max_cache_entries': 20,    # per stage, least recently used are removed
+    'clean': {
+        'drop_duplicates': False
+    },
+    'split': {
+        'test_size': 0.2,
+        'random_state': 42
+    },
+    'preprocess': {
+        'scale_numeric': True,
+        'handle_unknown': 'ignore'
+    },
+    'search': {
+        'cv': 5,
+        'scoring': 'neg_root_mean_squared_error',
+        'n_jobs': -1,           # offline runs (python -m core.training) use every core
+        'api_n_jobs': 1,        # API retrains stay in the training thread, cores left for inference
+        'models': {     # estimator name -> constructor arguments and parameter grid
+            'LinearRegression': {'init': {}, 'grid': {'fit_intercept': [True, False]}},
+            'Ridge': {'init': {}, 'grid': {'alpha': [0.1, 1.0, 10.0, 100.0]}},
+            'Lasso': {'init': {'max_iter': 10000}, 'grid': {'alpha': [0.001, 0.01, 0.1, 1.0]}},
+            'ElasticNet': {
+                'init': {'max_iter': 10000},
+                'grid': {'alpha': [0.001, 0.01, 0.1, 1.0], 'l1_ratio': [0.2, 0.5, 0.8]}
+            }
+        }
+    },
+    'evaluate': {
+        'cv': 5,
+        'selection_metric': 'rmse'  # lowest wins
+    }
+}
+
+# Storage Configuration
+# 'none' keeps all tables in DATABASE_URL. 'region' stores insurance_records and
+# their prediction_results in one SQLite file per region; 'hash' spreads new
+# records round-robin over shard_count files (the shard of any ID is
+# id % shard_count). Each shard has its own write lock. model_metadata always
+# stays in DATABASE_URL.
+STORAGE_CONFIG = {
+    'sharding': os.getenv('STORAGE_SHARDING', 'none'),
+    'shard_count': int(os.getenv('STORAGE_SHARD_COUNT', '4')),    # 'hash' mode only
+    'directory': os.path.join(BASE_DIR, "shards"),
+    'busy_timeout_seconds': 30
+}
@@ -0,0 +1,275 @@
+"""
+Streaming drift monitoring for Medical Cost Prediction API
+
+Incoming features and predicted charges are summarised in memory with
+fixed-bin histograms (numeric features) and counters (categorical features),
+so every prediction costs O(1) to record and a drift report never touches
+the database. The live summary is checkpointed to disk periodically and
+compared against a reference profile written at retrain time.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from bisect import bisect_right
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.config import CATEGORICAL_FEATURES, DRIFT_CONFIG, NUMERICAL_FEATURES, TARGET_FEATURE
+
+logger = logging.getLogger(__name__)
+
+# Predicted charges are tracked under the target name
+NUMERIC_COLUMNS = NUMERICAL_FEATURES + [TARGET_FEATURE]
+
+# Smoothing term so empty bins do not produce infinite PSI
+_EPSILON = 1e-4
+
+
+def _bin_edges(name: str) -> list:
+    """Return the histogram edges configured for a numeric column"""
+    low, high, n_bins = DRIFT_CONFIG['numeric_bins'][name]
+    return np.linspace(low, high, n_bins + 1).tolist()
+
+
+BIN_EDGES = {name: _bin_edges(name) for name in NUMERIC_COLUMNS}
+
+
+class StreamingProfile:
+    """
+    Mergeable summary of a feature distribution
+
+    Each numeric column holds ``len(edges) + 1`` counts: an underflow bin,
+    one bin per configured interval and an overflow bin.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.numeric = {
+            name: np.zeros(len(edges) + 1, dtype=np.int64)
+            for name, edges in BIN_EDGES.items()
+        }
+        self.categorical = {name: {} for name in CATEGORICAL_FEATURES}
+
+    def update(self, row: Dict[str, Any]):
+        """Add a single observation (feature values plus predicted charges)"""
+        for name, edges in BIN_EDGES.items():
+            self.numeric[name][bisect_right(edges, row[name])] += 1
+        for name in CATEGORICAL_FEATURES:
+            counts = self.categorical[name]
+            value = str(row[name])
+            counts[value] = counts.get(value, 0) + 1
+        self.count += 1
+
+    def update_many(self, frame: pd.DataFrame):
+        """Add a batch of observations using vectorised binning"""
+        for name, edges in BIN_EDGES.items():
+            idx = np.searchsorted(edges, frame[name].to_numpy(dtype=float), side='right')
+            self.numeric[name] += np.bincount(idx, minlength=len(edges) + 1)
+        for name in CATEGORICAL_FEATURES:
+            counts = self.categorical[name]
+            for value, n in frame[name].astype(str).value_counts().items():
+                counts[value] = counts.get(value, 0) + int(n)
+        self.count += len(frame)
+
+    def merge(self, other: "StreamingProfile") -> "StreamingProfile":
+        """Merge another profile into this one and return self"""
+        for name in self.numeric:
+            self.numeric[name] += other.numeric[name]
+        for name, counts in other.categorical.items():
+            target = self.categorical.setdefault(name, {})
+            for value, n in counts.items():
+                target[value] = target.get(value, 0) + n
+        self.count += other.count
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'bin_edges': BIN_EDGES,
+            'numeric': {name: counts.tolist() for name, counts in self.numeric.items()},
+            'categorical': self.categorical
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StreamingProfile":
+        profile = cls()
+        if data.get('bin_edges') != BIN_EDGES:
+            raise ValueError("Profile was built with different bin edges than DRIFT_CONFIG")
+        profile.count = int(data['count'])
+        for name, counts in data['numeric'].items():
+            profile.numeric[name] = np.asarray(counts, dtype=np.int64)
+        for name, counts in data['categorical'].items():
+            profile.categorical[name] = {k: int(v) for k, v in counts.items()}
+        return profile
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "StreamingProfile":
+        profile = cls()
+        profile.update_many(frame)
+        return profile
+
+
+def _normalise(counts: np.ndarray) -> np.ndarray:
+    total = counts.sum()
+    if total == 0:
+        return np.full(len(counts), 1.0 / len(counts))
+    return counts / total
+
+
+def population_stability_index(expected: np.ndarray, actual: np.ndarray) -> float:
+    """PSI between two aligned count vectors"""
+    p = np.clip(_normalise(np.asarray(expected, dtype=float)), _EPSILON, None)
+    q = np.clip(_normalise(np.asarray(actual, dtype=float)), _EPSILON, None)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks_statistic(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Two-sample KS statistic computed on binned cumulative distributions"""
+    p = np.cumsum(_normalise(np.asarray(expected, dtype=float)))
+    q = np.cumsum(_normalise(np.asarray(actual, dtype=float)))
+    return float(np.max(np.abs(p - q)))
+
+
+def compare_profiles(reference: StreamingProfile, live: StreamingProfile) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Score drift of a live profile against a reference profile
+
+    Returns:
+        Dict mapping each feature to its ``psi`` and ``ks`` scores
+        (``ks`` is None for categorical features)
+    """
+    scores = {}
+    for name in NUMERIC_COLUMNS:
+        scores[name] = {
+            'psi': population_stability_index(reference.numeric[name], live.numeric[name]),
+            'ks': ks_statistic(reference.numeric[name], live.numeric[name])
+        }
+    for name in CATEGORICAL_FEATURES:
+        ref_counts = reference.categorical.get(name, {})
+        live_counts = live.categorical.get(name, {})
+        categories = sorted(set(ref_counts) | set(live_counts))
+        scores[name] = {
+            'psi': population_stability_index(
+                np.array([ref_counts.get(c, 0) for c in categories]),
+                np.array([live_counts.get(c, 0) for c in categories])
+            ),
+            'ks': None
+        }
+    return scores
+
+
+def _write_json(path: str, data: Dict[str, Any]):
+    """Write JSON atomically so a crash never leaves a truncated checkpoint"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Unique temp file so concurrent writers never share one
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _read_profile(path: str) -> Optional[StreamingProfile]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return StreamingProfile.from_dict(json.load(f))
+    except (ValueError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable drift profile {path}: {e}")
+        return None
+
+
+class DriftMonitor:
+    """Process-wide live profile with periodic checkpointing"""
+
+    def __init__(
+        self,
+        reference_path: str = DRIFT_CONFIG['reference_path'],
+        checkpoint_path: str = DRIFT_CONFIG['checkpoint_path'],
+        checkpoint_every: int = DRIFT_CONFIG['checkpoint_every']
+    ):
+        self.reference_path = reference_path
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        self.live = StreamingProfile()
+        self.reference: Optional[StreamingProfile] = None
+        self.last_checkpoint: Optional[str] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Restore the reference profile and the last live checkpoint from disk"""
+        with self._lock:
+            self.reference = _read_profile(self.reference_path)
+            live = _read_profile(self.checkpoint_path)
+            if live is not None:
+                self.live = live
+        logger.info(f"Drift monitor loaded ({self.live.count} live samples)")
+
+    def record(self, features: Dict[str, Any], predicted_charges: float):
+        """Record one prediction; checkpoints every ``checkpoint_every`` calls"""
+        row = dict(features)
+        row[TARGET_FEATURE] = float(predicted_charges)
+        with self._lock:
+            self.live.update(row)
+            self._pending += 1
+            due = self._pending >= self.checkpoint_every
+            if due:
+                # Only the thread that resets the counter writes the checkpoint
+                self._pending = 0
+        if due:
+            self.checkpoint()
+
+    def record_many(self, features: pd.DataFrame, predicted_charges: Iterable[float]):
+        """Record a batch of predictions"""
+        frame = features.assign(**{TARGET_FEATURE: np.asarray(predicted_charges, dtype=float)})
+        with self._lock:
+            self.live.update_many(frame)
+            self._pending += len(frame)
+            due = self._pending >= self.checkpoint_every
+            if due:
+                self._pending = 0
+        if due:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Persist the live profile to disk"""
+        with self._lock:
+            data = self.live.to_dict()
+            self._pending = 0
+        try:
+            _write_json(self.checkpoint_path, data)
+            self.last_checkpoint = datetime.utcnow().isoformat() + "Z"
+        except OSError as e:
+            logger.error(f"Error writing drift checkpoint: {e}")
+
+    def set_reference(self, profile: StreamingProfile):
+        """Install a new reference profile and start a fresh live window"""
+        _write_json(self.reference_path, profile.to_dict())
+        with self._lock:
+            self.reference = profile
+            self.live = StreamingProfile()
+            self._pending = 0
+        self.checkpoint()
+        logger.info(f"Drift reference profile updated ({profile.count} samples)")
+
+    def snapshot(self):
+        """Return copies of the reference and live profiles for scoring"""
+        with self._lock:
+            live = StreamingProfile().merge(self.live)
+            return self.reference, live
+
+
+# Default monitor instance
+drift_monitor = DriftMonitor()
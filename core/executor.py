@@ -0,0 +1,158 @@
+"""
+Bounded executors for CPU-bound work in Medical Cost Prediction API
+
+Model inference, the pandas work around it and retraining run on thread
+pools instead of the event loop. Each pool admits work only while its queue
+depth and estimated wait stay under the configured limits; everything else
+is rejected immediately with a Retry-After hint so accepted requests keep a
+stable latency under overload.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+from core.config import EXECUTOR_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest sample in the moving average of service time
+_EWMA_ALPHA = 0.2
+
+
+class OverloadedError(HTTPException):
+    """Raised when an executor refuses new work"""
+
+    def __init__(self, executor_name: str, reason: str, retry_after: int, status_code: int):
+        super().__init__(
+            status_code=status_code,
+            detail=f"Server busy ({executor_name}: {reason}), retry later",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+class BoundedExecutor:
+    """Thread pool with admission control and load shedding"""
+
+    # Optional wrapper called as task_wrapper(fn, *args, **kwargs) in the
+    # worker thread (installed by utils.profiling when profiling is enabled)
+    task_wrapper: Optional[Callable] = None
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue_depth: int,
+        max_wait_seconds: Optional[float],
+        retry_after_seconds: int,
+        rejection_status: int = 503
+    ):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self.max_wait_seconds = max_wait_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.rejection_status = rejection_status
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-worker")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._avg_service_seconds = 0.0
+        self._counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0}
+
+    def _estimated_wait(self, in_flight: int) -> float:
+        """Expected time a new task waits before a worker picks it up"""
+        queued_ahead = max(0, in_flight + 1 - self.max_workers)
+        return queued_ahead / self.max_workers * self._avg_service_seconds
+
+    def _admit(self):
+        with self._lock:
+            queue_depth = max(0, self._in_flight + 1 - self.max_workers)
+            reason = None
+            if queue_depth > self.max_queue_depth:
+                reason = "queue full"
+            elif (self.max_wait_seconds is not None
+                  and self._estimated_wait(self._in_flight) > self.max_wait_seconds):
+                reason = "estimated wait too long"
+
+            if reason:
+                self._counters['rejected'] += 1
+            else:
+                self._in_flight += 1
+                self._counters['submitted'] += 1
+
+        if reason:
+            logger.warning(f"Executor '{self.name}' rejected work: {reason}")
+            raise OverloadedError(self.name, reason, self.retry_after_seconds, self.rejection_status)
+
+    def _timed(self, fn: Callable, *args, **kwargs) -> Any:
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                if self._avg_service_seconds == 0.0:
+                    self._avg_service_seconds = elapsed
+                else:
+                    self._avg_service_seconds += _EWMA_ALPHA * (elapsed - self._avg_service_seconds)
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run ``fn(*args, **kwargs)`` on the pool and await its result
+
+        Raises:
+            OverloadedError: If the task is not admitted
+        """
+        self._admit()
+        ctx = contextvars.copy_context()
+        if self.task_wrapper is not None:
+            fn, args = self.task_wrapper, (fn,) + args
+        call = functools.partial(ctx.run, self._timed, fn, *args, **kwargs)
+        try:
+            future = self._pool.submit(call)
+        except BaseException:
+            with self._lock:
+                self._in_flight -= 1
+                self._counters['failed'] += 1
+            raise
+        # Released when the worker is done, not when the caller stops waiting,
+        # so cancelled requests still count until their thread is free
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future: Future):
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled() or future.exception() is not None:
+                self._counters['failed'] += 1
+            else:
+                self._counters['completed'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Current queue depth, service time and counters"""
+        with self._lock:
+            return {
+                'name': self.name,
+                'max_workers': self.max_workers,
+                'max_queue_depth': self.max_queue_depth,
+                'in_flight': self._in_flight,
+                'queue_depth': max(0, self._in_flight - self.max_workers),
+                'avg_service_seconds': round(self._avg_service_seconds, 6),
+                'estimated_wait_seconds': round(self._estimated_wait(self._in_flight), 6),
+                **self._counters
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Default executor instances
+inference_executor = BoundedExecutor('inference', **EXECUTOR_CONFIG['inference'])
+training_executor = BoundedExecutor('training', **EXECUTOR_CONFIG['training'])
@@ -2,18 +2,47 @@
 Model inference utilities for Medical Cost Prediction API
 """
 
+import json
+import os
+import shutil
 import joblib
 import logging
+from typing import List, Optional
 from core.config import MODEL_PATH
+from core.config import MODEL_VERSIONS_DIR
 from core.config import PREPROCESSOR_PATH
 from core.config import METRICS_PATH
+from core.config import DEFAULT_MODEL_VERSION
 
 logger = logging.getLogger(__name__)
 
-def load_model():    
-    """Load the trained regression model"""
+def model_version_path(version: str) -> str:
+    """Path of an archived model version"""
+    if not version.replace(".", "").replace("-", "").replace("_", "").isalnum():
+        raise ValueError(f"Invalid model version '{version}'")
+    return os.path.join(MODEL_VERSIONS_DIR, f"{version}.joblib")
+
+def list_model_versions() -> List[str]:
+    """Versions of all archived models"""
+    if not os.path.isdir(MODEL_VERSIONS_DIR):
+        return []
+    return sorted(name[:-len(".joblib")] for name in os.listdir(MODEL_VERSIONS_DIR) if name.endswith(".joblib"))
+
+def archive_model(version: str) -> str:
+    """Copy the served model to the versions archive"""
+    os.makedirs(MODEL_VERSIONS_DIR, exist_ok=True)
+    path = model_version_path(version)
+    # Copy then rename, so a backfill never loads a half-written version
+    tmp_path = f"{path}.tmp"
+    shutil.copyfile(MODEL_PATH, tmp_path)
+    os.replace(tmp_path, path)
+    logger.info(f"Model archived as version {version}")
+    return path
+
+def load_model(version: Optional[str] = None):
+    """Load the trained regression model, or an archived version of it"""
     try:
-        model = joblib.load(MODEL_PATH)
+        model = joblib.load(MODEL_PATH if version is None else model_version_path(version))
         logger.info(f"Model loaded successfully: {type(model).__name__}")
         return model
     except Exception as e:
@@ -33,13 +62,22 @@ def load_preprocessor():
 def load_metrics():
     """Load the metrics file"""
     try:
-        metrics = joblib.load(METRICS_PATH)
+        with open(METRICS_PATH) as f:
+            metrics = json.load(f)
         logger.info("Metrics loaded successfully")
         return metrics
     except Exception as e:
         logger.error(f"Error loading metrics: {e}")
         raise
 
+def model_version_of(model) -> str:
+    """
+    Version a loaded model was promoted as, stored on the model itself so
+    one load returns both (DEFAULT_MODEL_VERSION if it was not promoted by
+    a retrain)
+    """
+    return str(getattr(model, 'model_version', None) or DEFAULT_MODEL_VERSION)
+
 def get_model_info():
     """Get information about the loaded model"""
     try:
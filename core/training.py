@@ -0,0 +1,537 @@
+"""
+Training pipeline for Medical Cost Prediction API
+
+The stages of ``notebook/medical_cost_regression_pipeline.ipynb`` as
+importable functions:
+
+    load -> clean -> split -> fit_preprocessor -> search_models -> evaluate -> export
+
+Stage outputs are content-addressed: each key is a hash of the upstream
+stage's key and the stage's own parameters (the root key is a fingerprint
+of the loaded data), and outputs are stored in
+``TRAINING_CONFIG['cache_dir']/<stage>/<key>.joblib``. Re-running after a
+parameter change recomputes only the affected stage and those downstream
+of it. The model search is cached per estimator, so changing one grid only
+re-searches that estimator.
+
+Used by the API retrain path (``service.retrain``) and offline:
+
+    python -m core.training [--from-db] [--set split.test_size=0.25] [--export]
+"""
+
+import argparse
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import ElasticNet, Lasso, LinearRegression, Ridge
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import GridSearchCV, cross_val_score, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from core.config import (
+    CATEGORICAL_FEATURES, CATEGORY_DOMAINS, METRICS_PATH, MODEL_PATH,
+    NUMERIC_RANGES, NUMERICAL_FEATURES, PREPROCESSOR_PATH, TARGET_FEATURE, TRAINING_CONFIG
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump to invalidate cached stage outputs when a stage's code changes
+PIPELINE_VERSION = 1
+
+FEATURE_COLUMNS = NUMERICAL_FEATURES + CATEGORICAL_FEATURES
+
+ESTIMATORS = {
+    'LinearRegression': LinearRegression,
+    'Ridge': Ridge,
+    'Lasso': Lasso,
+    'ElasticNet': ElasticNet
+}
+
+
+# ---------- cache ---------------------------------------------------
+class StageCache:
+    """On-disk store of stage outputs keyed by content hash"""
+
+    def __init__(
+        self,
+        directory: str = TRAINING_CONFIG['cache_dir'],
+        enabled: bool = True,
+        max_entries: int = TRAINING_CONFIG['max_cache_entries']
+    ):
+        self.directory = directory
+        self.enabled = enabled
+        self.max_entries = max_entries
+        # Per-run report: stage, key, whether it was cached, seconds
+        self.report: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def key(stage: str, upstream: List[str], params: Any) -> str:
+        payload = json.dumps(
+            {'stage': stage, 'version': PIPELINE_VERSION, 'upstream': upstream, 'params': params},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.directory, stage, f"{key}.joblib")
+
+    def _prune(self, stage: str):
+        stage_dir = os.path.join(self.directory, stage)
+        entries = sorted(
+            (os.path.join(stage_dir, name) for name in os.listdir(stage_dir) if name.endswith(".joblib")),
+            key=os.path.getmtime
+        )
+        for path in entries[:-self.max_entries]:
+            os.remove(path)
+
+    def run(self, stage: str, key: str, compute: Callable[[], Any], label: Optional[str] = None) -> Any:
+        """Return the cached output of a stage, computing and storing it on a miss"""
+        path = self._path(stage, key)
+        label = label or stage
+        start = time.perf_counter()
+
+        if self.enabled and os.path.exists(path):
+            try:
+                value = joblib.load(path)
+                os.utime(path)  # least recently used are pruned first
+                self.report.append({'stage': label, 'key': key, 'cached': True,
+                                    'seconds': time.perf_counter() - start})
+                return value
+            except Exception as e:
+                logger.warning(f"Discarding unreadable cache entry {path}: {e}")
+
+        value = compute()
+        if self.enabled:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            joblib.dump(value, tmp_path)
+            os.replace(tmp_path, path)
+            self._prune(stage)
+        self.report.append({'stage': label, 'key': key, 'cached': False,
+                            'seconds': time.perf_counter() - start})
+        return value
+
+
+# ---------- stages --------------------------------------------------
+def load_csv(path: str = TRAINING_CONFIG['data_path']) -> pd.DataFrame:
+    """Load the insurance dataset from a CSV file"""
+    df = pd.read_csv(path)
+    logger.info(f"Loaded {len(df)} rows from {path}")
+    return df
+
+
+def load_database_snapshot() -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Load all training records from the database (all shards if storage is
+    sharded) together with their data watermark
+
+    Returns:
+        Tuple[pd.DataFrame, Dict[str, Any]]: Training rows, and the storage
+            layout (``sharding``), largest training record ID of every shard
+            (``last_ids``) and load time (``loaded_at``) of the rows read
+    """
+    from sqlalchemy import select
+    from database.models import InsuranceRecord
+    from database.session import get_sync_engines, shard_router
+
+    columns = [getattr(InsuranceRecord, name) for name in FEATURE_COLUMNS + [TARGET_FEATURE]]
+    query = (select(InsuranceRecord.id, *columns)
+             .where(InsuranceRecord.is_training_data == True)
+             .order_by(InsuranceRecord.id))
+    loaded_at = datetime.utcnow()
+    frames, last_ids = [], []
+    # One engine per shard if storage is sharded, merged in shard order
+    for engine in get_sync_engines():
+        try:
+            frame = pd.read_sql_query(query, engine)
+        finally:
+            engine.dispose()
+        # Rows with larger IDs were not part of this training set
+        last_ids.append(int(frame['id'].iloc[-1]) if len(frame) else 0)
+        frames.append(frame.drop(columns='id'))
+    df = pd.concat(frames, ignore_index=True)
+    logger.info(f"Loaded {len(df)} training records from the database")
+    return df, {'sharding': shard_router.mode, 'last_ids': last_ids, 'loaded_at': loaded_at}
+
+
+def load_database() -> pd.DataFrame:
+    """Load all training records from the database (all shards if storage is sharded)"""
+    return load_database_snapshot()[0]
+
+
+def fingerprint(df: pd.DataFrame) -> str:
+    """Content hash of a DataFrame (columns and values, not the index)"""
+    digest = hashlib.sha256(json.dumps([str(column) for column in df.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def clean(df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Keep the feature and target columns and drop rows the API would reject
+
+    Args:
+        df: Raw rows with the columns of data/insurance.csv
+        params: ``drop_duplicates``
+
+    Returns:
+        pd.DataFrame: Valid rows with numeric columns coerced
+    """
+    df = df[FEATURE_COLUMNS + [TARGET_FEATURE]].copy()
+    for name in NUMERICAL_FEATURES + [TARGET_FEATURE]:
+        df[name] = pd.to_numeric(df[name], errors='coerce')
+
+    valid = df.notna().all(axis=1) & (df[TARGET_FEATURE] > 0)
+    for name in NUMERICAL_FEATURES:
+        low, high = NUMERIC_RANGES[name]
+        valid &= df[name].between(low, high)
+    for name in CATEGORICAL_FEATURES:
+        valid &= df[name].isin(CATEGORY_DOMAINS[name])
+
+    cleaned = df[valid]
+    if params['drop_duplicates']:
+        cleaned = cleaned.drop_duplicates()
+    cleaned = cleaned.reset_index(drop=True)
+
+    if len(cleaned) < len(df):
+        logger.info(f"Cleaning dropped {len(df) - len(cleaned)} of {len(df)} rows")
+    return cleaned
+
+
+def split(df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Train/test split of features and target"""
+    X_train, X_test, y_train, y_test = train_test_split(
+        df[FEATURE_COLUMNS], df[TARGET_FEATURE],
+        test_size=params['test_size'], random_state=params['random_state']
+    )
+    logger.info(f"Split data - Train: {len(X_train)}, Test: {len(X_test)}")
+    return {'X_train': X_train, 'X_test': X_test, 'y_train': y_train, 'y_test': y_test}
+
+
+def create_preprocessor(params: Dict[str, Any]) -> ColumnTransformer:
+    """ColumnTransformer that scales numeric and one-hot encodes categorical features"""
+    return ColumnTransformer(
+        transformers=[
+            ('numeric', StandardScaler() if params['scale_numeric'] else 'passthrough', NUMERICAL_FEATURES),
+            ('categorical', OneHotEncoder(handle_unknown=params['handle_unknown']), CATEGORICAL_FEATURES)
+        ],
+        remainder='drop',
+        sparse_threshold=0
+    )
+
+
+def fit_preprocessor(data: Dict[str, Any], params: Dict[str, Any]) -> ColumnTransformer:
+    """Preprocessor fitted on the training split"""
+    return create_preprocessor(params).fit(data['X_train'])
+
+
+def search_model(
+    name: str,
+    spec: Dict[str, Any],
+    data: Dict[str, Any],
+    preprocess_params: Dict[str, Any],
+    params: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Grid search one estimator inside a preprocessing + regressor pipeline
+
+    Args:
+        name: Key of ESTIMATORS
+        spec: ``init`` constructor arguments and parameter ``grid``
+        data: Output of split
+        preprocess_params: Preprocessor parameters (refitted in every fold)
+        params: ``cv``, ``scoring`` and ``n_jobs``
+
+    Returns:
+        Dict[str, Any]: Best pipeline refitted on the training split, its
+            parameters, CV score and search time
+    """
+    pipeline = Pipeline([
+        ('preprocess', create_preprocessor(preprocess_params)),
+        ('regressor', ESTIMATORS[name](**spec['init']))
+    ])
+    grid_search = GridSearchCV(
+        pipeline,
+        param_grid={f"regressor__{key}": values for key, values in spec['grid'].items()},
+        cv=params['cv'],
+        scoring=params['scoring'],
+        n_jobs=params['n_jobs']
+    )
+
+    start = time.perf_counter()
+    grid_search.fit(data['X_train'], data['y_train'])
+    fit_seconds = time.perf_counter() - start
+
+    logger.info(f"{name} best params: {grid_search.best_params_} ({fit_seconds:.2f}s)")
+    return {
+        'name': name,
+        'estimator': grid_search.best_estimator_,
+        'best_params': grid_search.best_params_,
+        'cv_score': grid_search.best_score_,
+        'fit_seconds': fit_seconds
+    }
+
+
+def adjusted_r2_score(y_true, y_pred, n_features: int) -> float:
+    """R² adjusted for the number of features"""
+    n = len(y_true)
+    return 1 - (1 - r2_score(y_true, y_pred)) * (n - 1) / max(n - n_features - 1, 1)
+
+
+def evaluate(
+    data: Dict[str, Any],
+    searched: Dict[str, Dict[str, Any]],
+    preprocessor: ColumnTransformer,
+    params: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Score every searched model on the test split and pick the best
+
+    Returns:
+        Dict[str, Any]: ``metrics`` per model and the ``best_model`` name
+    """
+    n_features = len(preprocessor.get_feature_names_out())
+    metrics = {}
+    for name, result in searched.items():
+        model = result['estimator']
+        y_pred = model.predict(data['X_test'])
+        mse = mean_squared_error(data['y_test'], y_pred)
+        cv_r2 = cross_val_score(model, data['X_train'], data['y_train'], cv=params['cv'], scoring='r2')
+        metrics[name] = {
+            'r2': r2_score(data['y_test'], y_pred),
+            'adjusted_r2': adjusted_r2_score(data['y_test'], y_pred, n_features),
+            'mse': mse,
+            'rmse': float(np.sqrt(mse)),
+            'mae': mean_absolute_error(data['y_test'], y_pred),
+            'cv_r2_mean': cv_r2.mean(),
+            'cv_r2_std': cv_r2.std(),
+            'fit_seconds': result['fit_seconds'],
+            'best_params': result['best_params']
+        }
+
+    best_model = min(metrics, key=lambda name: metrics[name][params['selection_metric']])
+    logger.info(f"Best model: {best_model} (RMSE {metrics[best_model]['rmse']:.2f})")
+    return {'metrics': metrics, 'best_model': best_model}
+
+
+def export_artifacts(
+    result: Dict[str, Any],
+    model_path: str = MODEL_PATH,
+    preprocessor_path: str = PREPROCESSOR_PATH,
+    metrics_path: str = METRICS_PATH,
+    model_version: Optional[str] = None
+):
+    """
+    Save the best pipeline, its fitted preprocessor and the evaluation metrics
+
+    All files are written to temporary paths first and then swapped in with
+    ``os.replace``, so inference threads loading them concurrently always
+    see complete files. The version is stored on the model pipeline itself
+    (``model_version``), so a prediction never pairs a model with another
+    model's version.
+
+    Args:
+        result: Output of run_pipeline
+        model_path: Destination of the model pipeline
+        preprocessor_path: Destination of the fitted preprocessor
+        metrics_path: Destination of the metrics file
+        model_version: Version live predictions are tagged with (also recorded
+            in the metrics file)
+    """
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    metrics = {
+        'best_model': result['model_type'],
+        'metrics': result['metrics'],
+        'samples': result['samples'],
+        'cache_keys': result['cache_keys']
+    }
+    model = result['model']
+    if model_version is not None:
+        # Shallow copy, so the cached search result is left untouched
+        model = copy.copy(model)
+        model.model_version = model_version
+        metrics['model_version'] = model_version
+
+    writers = {
+        model_path: lambda tmp_path: joblib.dump(model, tmp_path),
+        preprocessor_path: lambda tmp_path: joblib.dump(result['preprocessor'], tmp_path),
+        metrics_path: lambda tmp_path: _write_json(tmp_path, metrics)
+    }
+    try:
+        for path, write in writers.items():
+            write(f"{path}.tmp")
+        for path in writers:
+            os.replace(f"{path}.tmp", path)
+    except BaseException:
+        for path in writers:
+            if os.path.exists(f"{path}.tmp"):
+                os.remove(f"{path}.tmp")
+        raise
+    logger.info(f"Model, preprocessor and metrics saved to {os.path.dirname(model_path)}")
+
+
+def _write_json(path: str, data: Dict[str, Any]):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, default=str)
+
+
+# ---------- pipeline ------------------------------------------------
+def run_pipeline(
+    df: pd.DataFrame,
+    config: Dict[str, Any] = TRAINING_CONFIG,
+    cache: Optional[StageCache] = None
+) -> Dict[str, Any]:
+    """
+    Run clean -> split -> fit_preprocessor -> search_models -> evaluate on loaded data
+
+    Args:
+        df: Loaded rows (load_csv or load_database)
+        config: Stage parameters, shaped like TRAINING_CONFIG
+        cache: Stage cache (defaults to one in config['cache_dir'])
+
+    Returns:
+        Dict[str, Any]: Best ``model`` pipeline and ``model_type``, fitted
+            ``preprocessor``, ``metrics`` per model, the cleaned ``data``
+            and its ``split``, ``samples`` and the ``cache_keys`` and
+            ``report`` of every stage
+    """
+    cache = cache or StageCache(config['cache_dir'], max_entries=config['max_cache_entries'])
+    keys = {'load': fingerprint(df)}
+
+    keys['clean'] = cache.key('clean', [keys['load']], config['clean'])
+    cleaned = cache.run('clean', keys['clean'], lambda: clean(df, config['clean']))
+
+    keys['split'] = cache.key('split', [keys['clean']], config['split'])
+    data = cache.run('split', keys['split'], lambda: split(cleaned, config['split']))
+
+    keys['fit_preprocessor'] = cache.key('fit_preprocessor', [keys['split']], config['preprocess'])
+    preprocessor = cache.run('fit_preprocessor', keys['fit_preprocessor'],
+                             lambda: fit_preprocessor(data, config['preprocess']))
+
+    search_params = {key: value for key, value in config['search'].items() if key != 'models'}
+    # Parallelism does not change the result, so it is not part of the key
+    key_params = {key: value for key, value in search_params.items() if key not in ('n_jobs', 'api_n_jobs')}
+    searched = {}
+    for name, spec in config['search']['models'].items():
+        key = cache.key('search_models', [keys['fit_preprocessor']], {'name': name, 'spec': spec, **key_params})
+        keys[f'search_models.{name}'] = key
+        searched[name] = cache.run(
+            'search_models', key,
+            lambda name=name, spec=spec: search_model(name, spec, data, config['preprocess'], search_params),
+            label=f"search_models[{name}]"
+        )
+
+    search_keys = sorted(key for stage, key in keys.items() if stage.startswith('search_models.'))
+    keys['evaluate'] = cache.key('evaluate', [keys['split'], keys['fit_preprocessor']] + search_keys,
+                                 config['evaluate'])
+    evaluation = cache.run('evaluate', keys['evaluate'],
+                           lambda: evaluate(data, searched, preprocessor, config['evaluate']))
+
+    best_model = evaluation['best_model']
+    return {
+        'model': searched[best_model]['estimator'],
+        'model_type': best_model,
+        'preprocessor': preprocessor,
+        'metrics': evaluation['metrics'],
+        'data': cleaned,
+        'split': data,
+        'samples': {'loaded': len(df), 'cleaned': len(cleaned),
+                    'train': len(data['X_train']), 'test': len(data['X_test'])},
+        'cache_keys': keys,
+        'report': cache.report
+    }
+
+
+# ---------- command line --------------------------------------------
+def apply_override(config: Dict[str, Any], assignment: str):
+    """Apply a ``dotted.path=value`` override (value parsed as JSON, else string)"""
+    path, separator, raw = assignment.partition("=")
+    if not path or not separator:
+        raise ValueError(f"Override must look like stage.param=value, got '{assignment}'")
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        value = raw
+
+    node = config
+    *parents, leaf = path.split(".")
+    for part in parents:
+        if not isinstance(node.get(part), dict):
+            raise ValueError(f"Unknown config section '{part}' in '{path}'")
+        node = node[part]
+    node[leaf] = value
+
+
+async def publish(result, data_watermark=None) -> str:
+    """
+    Serve an offline training result through the same path as API retrains:
+    record it in model_metadata to get its version, then export and archive
+    it (service.retrain.publish_model)
+    """
+    # Imported here, service.retrain builds on this module
+    from database.models import ModelMetadata
+    from database.session import AsyncSessionLocal, add_missing_columns, engine
+    from service.retrain import publish_model
+
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(add_missing_columns, ModelMetadata.__table__)
+        async with AsyncSessionLocal() as db:
+            return await publish_model(db, result, data_watermark, executor=None)
+    finally:
+        await engine.dispose()
+
+
+def main(argv=None) -> bool:
+    parser = argparse.ArgumentParser(description="Run the cached training pipeline")
+    parser.add_argument("--data", default=TRAINING_CONFIG['data_path'], help="CSV file to train on")
+    parser.add_argument("--from-db", action="store_true", help="Train on the training records in the database")
+    parser.add_argument("--set", action="append", default=[], metavar="STAGE.PARAM=VALUE",
+                        help="Override a TRAINING_CONFIG parameter, e.g. search.models.Ridge.grid.alpha=[1,10]")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute every stage")
+    parser.add_argument("--export", action="store_true",
+                        help="Serve the best model like POST /api/v1/retrain (recorded in model_metadata and archived by version)")
+    args = parser.parse_args(argv)
+
+    config = copy.deepcopy(TRAINING_CONFIG)
+    for assignment in args.set:
+        apply_override(config, assignment)
+
+    # Exports record the database snapshot they were trained on, like API retrains
+    df, data_watermark = load_database_snapshot() if args.from_db else (load_csv(args.data), None)
+    cache = StageCache(config['cache_dir'], enabled=not args.no_cache, max_entries=config['max_cache_entries'])
+    result = run_pipeline(df, config, cache)
+
+    for entry in result['report']:
+        status = "cached" if entry['cached'] else "computed"
+        print(f"{'✅' if entry['cached'] else '🔄'} {entry['stage']:<34} {entry['key']}  {status} in {entry['seconds']:.2f}s")
+
+    print()
+    print(pd.DataFrame(result['metrics']).T.drop(columns='best_params').sort_values('rmse').round(4).to_string())
+    print(f"\n🏆 Best model: {result['model_type']}")
+
+    if args.export:
+        model_version = asyncio.run(publish(result, data_watermark))
+        print(f"✅ Exported model version {model_version} (model, preprocessor and metrics) to {os.path.dirname(MODEL_PATH)}")
+    return True
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    try:
+        raise SystemExit(0 if main() else 1)
+    except (OSError, ValueError) as e:
+        print(f"❌ Training failed: {e}")
+        raise SystemExit(1)
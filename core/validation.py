@@ -0,0 +1,143 @@
+"""
+Columnar input validation for Medical Cost Prediction API
+
+Batch inputs are validated a column at a time with pandas/NumPy instead of
+one pydantic model per row. The rules mirror ``schema.prediction.InsuranceInput``:
+categorical values must belong to ``CATEGORY_DOMAINS`` and to the categories
+the fitted encoder knows, numeric values must lie in ``NUMERIC_RANGES``.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.config import (
+    CATEGORICAL_FEATURES, CATEGORY_DOMAINS, INTEGER_FEATURES,
+    NUMERIC_RANGES, NUMERICAL_FEATURES, PREDICTION_CONFIG
+)
+
+logger = logging.getLogger(__name__)
+
+FEATURE_COLUMNS = NUMERICAL_FEATURES + CATEGORICAL_FEATURES
+
+
+class InputValidationError(ValueError):
+    """Raised when one or more input rows break the validation rules"""
+
+    def __init__(self, errors: List[Dict[str, Any]], invalid_rows: int):
+        self.errors = errors
+        self.invalid_rows = invalid_rows
+        first = errors[0] if errors else {}
+        super().__init__(
+            f"{invalid_rows} invalid input row(s); first error: "
+            f"row {first.get('row')} '{first.get('field')}' {first.get('message')}"
+        )
+
+
+def _json_value(value: Any) -> Any:
+    """Make an offending input value safe to echo back in an error report"""
+    if not pd.api.types.is_scalar(value) or pd.isna(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def get_category_domains(preprocessor=None) -> Dict[str, List[str]]:
+    """
+    Allowed values per categorical feature
+
+    Args:
+        preprocessor: Optional fitted ColumnTransformer; when given, each
+            domain is restricted to the categories its encoder was fitted on
+
+    Returns:
+        Dict[str, List[str]]: Allowed values per categorical feature
+    """
+    domains = {name: list(CATEGORY_DOMAINS[name]) for name in CATEGORICAL_FEATURES}
+
+    for _, transformer, columns in getattr(preprocessor, 'transformers_', []):
+        if not hasattr(transformer, 'categories_'):
+            continue
+        for column, categories in zip(columns, transformer.categories_):
+            if column in domains:
+                known = {str(c) for c in categories}
+                domains[column] = [value for value in domains[column] if value in known]
+
+    return domains
+
+
+def validate_frame(
+    df: pd.DataFrame,
+    domains: Optional[Dict[str, List[str]]] = None,
+    max_errors: int = PREDICTION_CONFIG['max_validation_errors']
+) -> pd.DataFrame:
+    """
+    Validate and coerce a batch of inputs column by column
+
+    Args:
+        df: Input rows; extra columns are ignored
+        domains: Allowed categorical values (defaults to get_category_domains())
+        max_errors: Maximum number of row errors to report
+
+    Returns:
+        pd.DataFrame: The feature columns with numeric dtypes coerced
+
+    Raises:
+        InputValidationError: If a column is missing or any row is invalid.
+            ``errors`` holds ``{"row", "field", "value", "message"}`` entries
+            ordered by row.
+    """
+    missing = [name for name in FEATURE_COLUMNS if name not in df.columns]
+    if missing:
+        raise InputValidationError(
+            [{'row': None, 'field': name, 'value': None, 'message': "missing column"} for name in missing],
+            invalid_rows=len(df)
+        )
+
+    domains = domains or get_category_domains()
+    clean = pd.DataFrame(index=df.index)
+    # (field, boolean mask of bad rows, message) per failed check
+    failures = []
+
+    for name in NUMERICAL_FEATURES:
+        values = pd.to_numeric(df[name], errors='coerce')
+        low, high = NUMERIC_RANGES[name]
+        not_number = values.isna().to_numpy()
+        out_of_range = ~not_number & ~values.between(low, high).to_numpy()
+        failures.append((name, not_number, "must be a number"))
+        failures.append((name, out_of_range, f"must be between {low} and {high}"))
+
+        if name in INTEGER_FEATURES:
+            not_integer = ~not_number & (values.fillna(0) % 1 != 0).to_numpy()
+            failures.append((name, not_integer, "must be an integer"))
+
+        clean[name] = values
+
+    for name in CATEGORICAL_FEATURES:
+        column = df[name]
+        unknown = ~column.isin(domains[name]).to_numpy()
+        failures.append((name, unknown, f"must be one of {domains[name]}"))
+        clean[name] = column
+
+    bad = np.zeros(len(df), dtype=bool)
+    for _, mask, _ in failures:
+        bad |= mask
+
+    if bad.any():
+        errors = []
+        for field, mask, message in failures:
+            for position in np.flatnonzero(mask)[:max_errors]:
+                errors.append({
+                    'row': int(position),
+                    'field': field,
+                    'value': _json_value(df[field].iat[position]),
+                    'message': message
+                })
+        errors.sort(key=lambda error: error['row'])
+        invalid_rows = int(bad.sum())
+        logger.warning(f"Input validation failed for {invalid_rows} of {len(df)} rows")
+        raise InputValidationError(errors[:max_errors], invalid_rows)
+
+    clean[INTEGER_FEATURES] = clean[INTEGER_FEATURES].astype(np.int64)
+    return clean[FEATURE_COLUMNS]
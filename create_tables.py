@@ -2,7 +2,8 @@
 import sys
 from sqlalchemy import create_engine, text
 from core.config import DATABASE_URL
-from database.models import Base
+from database.models import Base, InsuranceRecord, PredictionResult
+from database.session import shard_router
 
 def create_tables():
     try:
@@ -31,6 +32,15 @@ def create_tables():
                 missing = expected_tables - created_tables
                 raise Exception(f"Failed to create tables: {', '.join(missing)}")
         
+        # With sharded storage, records and predictions live in one file per shard
+        if shard_router.enabled:
+            shard_tables = [InsuranceRecord.__table__, PredictionResult.__table__]
+            for shard_engine in shard_router.sync_engines():
+                Base.metadata.drop_all(shard_engine, tables=shard_tables)
+                Base.metadata.create_all(shard_engine, tables=shard_tables)
+                shard_engine.dispose()
+            print(f"✅ Created tables in {shard_router.shard_count} shards ({shard_router.mode})")
+
         print("✅ All tables created successfully")
         return True
         
@@ -0,0 +1,313 @@
+"""
+Synthetic insurance data generator for scale testing
+
+Fits the joint distribution of ``data/insurance.csv`` and draws datasets of
+arbitrary size from it, chunk by chunk, so the database, retraining and
+prediction tables can be exercised at production volume.
+
+The fitted model:
+    - (sex, smoker, region): empirical joint frequencies
+    - age, children: empirical marginal frequencies
+    - bmi: normal distribution per region, clipped to the observed range
+    - charges: linear in age, age², bmi, children, smoker, smoker × bmi and
+      smoker × obese, with residuals resampled from the fitted residuals
+      of the matching (smoker, obese) group
+
+Every chunk is drawn from its own seed derived from (seed, chunk index), so
+the output is identical for any number of workers. At most ``2 × workers``
+chunks are in memory at once, independent of the requested row count.
+
+Usage:
+    python -m data.synthetic --rows 1000000 --output data/synthetic.csv.gz
+    python -m data.synthetic --rows 10000000 --output data/synthetic.parquet --workers 8
+    python -m data.synthetic --rows 1000000 --output synthetic.db
+"""
+
+import argparse
+import gzip
+import os
+import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+import numpy as np
+import pandas as pd
+
+from core.config import CATEGORICAL_FEATURES, TARGET_FEATURE
+
+CSV_FILE = Path("data/insurance.csv")
+COLUMNS = ['age', 'sex', 'bmi', 'children', 'smoker', 'region', TARGET_FEATURE]
+OBESE_BMI = 30.0
+
+
+def _design_matrix(age, bmi, children, smoker) -> np.ndarray:
+    """Regressors of the charges model"""
+    smoker = np.asarray(smoker, dtype=float)
+    bmi = np.asarray(bmi, dtype=float)
+    return np.column_stack([
+        np.ones(len(smoker)),
+        age,
+        np.square(age),
+        bmi,
+        children,
+        smoker,
+        smoker * bmi,
+        smoker * (bmi >= OBESE_BMI)
+    ])
+
+
+def _residual_group(smoker, bmi) -> np.ndarray:
+    """Residual group index: 2 × smoker + obese"""
+    return 2 * np.asarray(smoker, dtype=int) + (np.asarray(bmi) >= OBESE_BMI)
+
+
+def fit_distribution(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Fit the generator parameters to an insurance dataset
+
+    Args:
+        df: DataFrame with the columns of data/insurance.csv
+
+    Returns:
+        Dict[str, Any]: Picklable parameters consumed by generate_chunk
+    """
+    categories = df[CATEGORICAL_FEATURES].value_counts(normalize=True)
+    age = df['age'].value_counts(normalize=True).sort_index()
+    children = df['children'].value_counts(normalize=True).sort_index()
+    bmi = df.groupby('region')['bmi'].agg(['mean', 'std'])
+
+    is_smoker = (df['smoker'] == 'yes').to_numpy()
+    X = _design_matrix(df['age'], df['bmi'], df['children'], is_smoker)
+    y = df[TARGET_FEATURE].to_numpy()
+    coef, *_ = np.linalg.lstsq(X, y, rcond=None)
+    residuals = y - X @ coef
+    groups = _residual_group(is_smoker, df['bmi'])
+
+    return {
+        'categories': [list(combo) for combo in categories.index],
+        'category_probs': categories.to_numpy(),
+        'age_values': age.index.to_numpy(),
+        'age_probs': age.to_numpy(),
+        'children_values': children.index.to_numpy(),
+        'children_probs': children.to_numpy(),
+        'bmi_by_region': bmi.to_dict('index'),
+        'bmi_range': (float(df['bmi'].min()), float(df['bmi'].max())),
+        'charges_coef': coef,
+        'charges_min': float(y.min()),
+        'residuals': [residuals[groups == group] for group in range(4)]
+    }
+
+
+def generate_chunk(params: Dict[str, Any], seed: int, chunk_index: int, n_rows: int) -> pd.DataFrame:
+    """
+    Draw one chunk of synthetic rows
+
+    Args:
+        params: Output of fit_distribution
+        seed: Dataset seed
+        chunk_index: Position of the chunk in the dataset
+        n_rows: Number of rows to draw
+
+    Returns:
+        pd.DataFrame: Rows with the columns of data/insurance.csv
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk_index,)))
+
+    combos = np.asarray(params['categories'], dtype=object)
+    picked = combos[rng.choice(len(combos), size=n_rows, p=params['category_probs'])]
+    sex, smoker, region = picked[:, 0], picked[:, 1], picked[:, 2]
+
+    age = rng.choice(params['age_values'], size=n_rows, p=params['age_probs'])
+    children = rng.choice(params['children_values'], size=n_rows, p=params['children_probs'])
+
+    bmi = np.empty(n_rows)
+    for name, stats in params['bmi_by_region'].items():
+        mask = region == name
+        bmi[mask] = rng.normal(stats['mean'], stats['std'], size=mask.sum())
+    bmi = np.round(np.clip(bmi, *params['bmi_range']), 2)
+
+    is_smoker = smoker == 'yes'
+    charges = _design_matrix(age, bmi, children, is_smoker) @ params['charges_coef']
+    groups = _residual_group(is_smoker, bmi)
+    for group, residuals in enumerate(params['residuals']):
+        mask = groups == group
+        if len(residuals):
+            charges[mask] += rng.choice(residuals, size=mask.sum())
+    charges = np.maximum(charges, params['charges_min'])
+
+    return pd.DataFrame({
+        'age': age,
+        'sex': sex.astype(str),
+        'bmi': bmi,
+        'children': children,
+        'smoker': smoker.astype(str),
+        'region': region.astype(str),
+        TARGET_FEATURE: np.round(charges, 4)
+    }, columns=COLUMNS)
+
+
+def iter_chunks(
+    params: Dict[str, Any],
+    n_rows: int,
+    chunk_size: int,
+    seed: int,
+    workers: int
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield chunks in order, generated by a process pool with a bounded window
+
+    Args:
+        params: Output of fit_distribution
+        n_rows: Total number of rows
+        chunk_size: Rows per chunk
+        seed: Dataset seed
+        workers: Number of worker processes (1 generates in-process)
+    """
+    sizes = [min(chunk_size, n_rows - start) for start in range(0, n_rows, chunk_size)]
+
+    if workers <= 1:
+        for index, size in enumerate(sizes):
+            yield generate_chunk(params, seed, index, size)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for index, size in enumerate(sizes):
+            pending.append(pool.submit(generate_chunk, params, seed, index, size))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# ---------- writers -------------------------------------------------
+def write_csv(chunks: Iterator[pd.DataFrame], output: Path) -> int:
+    """Write chunks to CSV, gzip-compressed when the path ends with .gz"""
+    opener = gzip.open if output.suffix == ".gz" else open
+    total = 0
+    with opener(output, "wt", newline="") as f:
+        for chunk in chunks:
+            chunk.to_csv(f, header=(total == 0), index=False)
+            total += len(chunk)
+            _progress(total)
+    return total
+
+
+def write_parquet(chunks: Iterator[pd.DataFrame], output: Path) -> int:
+    """Write chunks to Parquet, one row group per chunk"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)")
+
+    writer = None
+    total = 0
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(output, table.schema, compression="zstd")
+            writer.write_table(table)
+            total += len(chunk)
+            _progress(total)
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
+
+
+def write_sqlite(chunks: Iterator[pd.DataFrame], output: Path) -> int:
+    """Append chunks to insurance_records in a SQLite database as training data"""
+    from sqlalchemy import create_engine
+    from database.models import Base
+
+    # Create the schema if the database is new
+    sync_engine = create_engine(f"sqlite:///{output}")
+    Base.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+
+    insert_sql = (
+        "INSERT INTO insurance_records "
+        "(age, sex, bmi, children, smoker, region, charges, is_training_data, source) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, 1, 'synthetic')"
+    )
+    total = 0
+    conn = sqlite3.connect(output)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for chunk in chunks:
+            with conn:
+                conn.executemany(insert_sql, chunk.itertuples(index=False, name=None))
+            total += len(chunk)
+            _progress(total)
+    finally:
+        conn.close()
+    return total
+
+
+WRITERS = {
+    'csv': write_csv,
+    'parquet': write_parquet,
+    'sqlite': write_sqlite
+}
+
+
+def _progress(total: int):
+    print(f"✅ Wrote {total:,} rows...", flush=True)
+
+
+def _infer_format(output: Path) -> str:
+    suffixes = output.suffixes
+    if ".parquet" in suffixes:
+        return 'parquet'
+    if suffixes and suffixes[-1] in (".db", ".sqlite", ".sqlite3"):
+        return 'sqlite'
+    return 'csv'
+
+
+# ---------- main ----------------------------------------------------
+def main(argv=None) -> bool:
+    parser = argparse.ArgumentParser(description="Generate synthetic insurance data")
+    parser.add_argument("--rows", type=int, required=True, help="Number of rows to generate")
+    parser.add_argument("--output", type=Path, required=True,
+                        help="Output path (.csv, .csv.gz, .parquet, or .db for SQLite)")
+    parser.add_argument("--format", choices=sorted(WRITERS), help="Override the format inferred from --output")
+    parser.add_argument("--chunk-size", type=int, default=250_000, help="Rows per chunk")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Generator processes")
+    parser.add_argument("--seed", type=int, default=42, help="Dataset seed")
+    parser.add_argument("--source-csv", type=Path, default=CSV_FILE, help="CSV the distribution is fitted to")
+    args = parser.parse_args(argv)
+
+    if not args.source_csv.exists():
+        print(f"❌ CSV file not found at {args.source_csv.absolute()}")
+        return False
+
+    fmt = args.format or _infer_format(args.output)
+    print(f"🚀 Generating {args.rows:,} rows ({fmt}) with {args.workers} workers...")
+
+    params = fit_distribution(pd.read_csv(args.source_csv))
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    chunks = iter_chunks(params, args.rows, args.chunk_size, args.seed, args.workers)
+    total = WRITERS[fmt](chunks, args.output)
+    elapsed = time.perf_counter() - start
+
+    print(f"✅ Generated {total:,} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s) -> {args.output}")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(0 if main() else 1)
+    except Exception as e:
+        print(f"❌ Fatal error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -2,7 +2,7 @@
 SQLAlchemy database models for Medical Cost Prediction
 """
 
-from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Boolean, func
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, Boolean, Index, func
 from sqlalchemy.orm import DeclarativeBase, relationship
 
 
@@ -36,6 +36,10 @@ class PredictionResult(Base):
     Model for storing prediction results
     """
     __tablename__ = "prediction_results"
+    __table_args__ = (
+        # Lookup of a record's prediction by a given model version (backfills)
+        Index("ix_prediction_results_record_id_model_version", "record_id", "model_version"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     record_id = Column(Integer, ForeignKey("insurance_records.id"), nullable=False)
@@ -61,3 +65,10 @@ class ModelMetadata(Base):
     training_samples = Column(Integer, nullable=False)
     test_samples = Column(Integer, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # False for a retrain that regressed and was kept out of service
+    promoted = Column(Boolean, nullable=False, default=True, server_default="1")
+    # Snapshot of the training data: storage layout, largest training record
+    # ID per shard (JSON list) and when the rows were read
+    data_sharding = Column(String(20), nullable=True)
+    data_last_ids = Column(String(500), nullable=True)
+    data_loaded_at = Column(DateTime, nullable=True)
@@ -1,6 +1,15 @@
+import asyncio
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from core.config import DATABASE_URL
+from core.config import DATABASE_URL, STORAGE_CONFIG, CATEGORY_DOMAINS
 
 # Create the base class
 Base = declarative_base()
@@ -21,6 +30,156 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False
 )
 
+def add_missing_columns(connection, table):
+    """
+    Add columns of a model missing from an existing table
+
+    Columns added to a model after its table was created (nullable or with a
+    server default) are appended with ALTER TABLE ADD COLUMN. Tables that do
+    not exist yet are left to create_tables.py.
+    """
+    inspector = inspect(connection)
+    if not inspector.has_table(table.name):
+        return
+    existing = {column['name'] for column in inspector.get_columns(table.name)}
+    for column in table.columns:
+        if column.name not in existing:
+            definition = CreateColumn(column).compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {definition}"))
+
+def get_sync_engine(**kwargs):
+    """Synchronous engine for long-running jobs outside the event loop"""
+    return create_engine(DATABASE_URL.replace("+aiosqlite", ""), **kwargs)
+
+class ShardRouter:
+    """
+    Routes insurance records and their prediction results to shard databases
+
+    Modes (``STORAGE_CONFIG['sharding']``):
+        none    everything in DATABASE_URL, the router is disabled
+        region  one shard per region
+        hash    ``shard_count`` shards, new records are spread round-robin
+
+    Each shard is a separate SQLite file with its own write lock, so writes
+    to different shards do not wait for each other. A record's prediction
+    results are stored in the record's shard. IDs are local to a shard; the
+    API exposes global IDs ``local_id * shard_count + shard_index``, so the
+    shard of any ID is ``id % shard_count``.
+    """
+
+    def __init__(self, config: Dict[str, Any] = STORAGE_CONFIG, echo: bool = True):
+        self.mode = config['sharding']
+        if self.mode == 'none':
+            self.names = []
+        elif self.mode == 'region':
+            self.names = list(CATEGORY_DOMAINS['region'])
+        elif self.mode == 'hash':
+            self.names = [f"shard{index}" for index in range(config['shard_count'])]
+        else:
+            raise ValueError(f"Unknown sharding mode '{self.mode}', expected 'none', 'region' or 'hash'")
+
+        self.directory = config['directory']
+        self.busy_timeout_seconds = config['busy_timeout_seconds']
+        self.echo = echo
+        self._engines = {}
+        self._sessionmakers = {}
+        self._next_row = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.names)
+
+    @property
+    def shard_count(self) -> int:
+        return len(self.names)
+
+    def url(self, index: int, driver: str = "sqlite+aiosqlite") -> str:
+        return f"{driver}:///{os.path.join(self.directory, self.names[index])}.db"
+
+    def _take_rows(self, count: int) -> int:
+        with self._lock:
+            start = self._next_row
+            self._next_row += count
+        return start
+
+    def route(self, region: str) -> int:
+        """Shard index for a new record"""
+        if self.mode == 'region':
+            return self.names.index(region)
+        return self._take_rows(1) % self.shard_count
+
+    def route_many(self, regions: Sequence[str]) -> np.ndarray:
+        """Shard index for each of a batch of new records"""
+        if self.mode == 'region':
+            codes = pd.Categorical(regions, categories=self.names).codes
+            if (codes < 0).any():
+                raise ValueError(f"Unknown region, expected one of {self.names}")
+            return codes.astype(np.int64)
+        start = self._take_rows(len(regions))
+        return (start + np.arange(len(regions))) % self.shard_count
+
+    def global_ids(self, local_ids, index: int):
+        """Global IDs of rows with the given local IDs in a shard"""
+        return np.asarray(local_ids, dtype=np.int64) * self.shard_count + index
+
+    def split_id(self, global_id: int) -> Tuple[int, int]:
+        """Shard index and local ID of a global ID"""
+        return global_id % self.shard_count, global_id // self.shard_count
+
+    def engine(self, index: int):
+        """Async engine of a shard, created on first use"""
+        if index not in self._engines:
+            os.makedirs(self.directory, exist_ok=True)
+            self._engines[index] = create_async_engine(
+                self.url(index),
+                echo=self.echo,
+                pool_size=10,
+                max_overflow=20,
+                connect_args={'timeout': self.busy_timeout_seconds}
+            )
+            self._sessionmakers[index] = async_sessionmaker(
+                bind=self._engines[index],
+                class_=AsyncSession,
+                expire_on_commit=False,
+                autoflush=False
+            )
+        return self._engines[index]
+
+    def session(self, index: int) -> AsyncSession:
+        """New async session on a shard"""
+        self.engine(index)
+        return self._sessionmakers[index]()
+
+    async def gather(self, fn: Callable[[AsyncSession, int], Awaitable[Any]]) -> List[Any]:
+        """Run ``fn(session, index)`` on every shard concurrently and return the results in shard order"""
+        async def run(index):
+            async with self.session(index) as session:
+                return await fn(session, index)
+
+        return await asyncio.gather(*(run(index) for index in range(self.shard_count)))
+
+    def sync_engines(self, **kwargs) -> List:
+        """New synchronous engines, one per shard (dispose them when done)"""
+        os.makedirs(self.directory, exist_ok=True)
+        return [create_engine(self.url(index, driver="sqlite"), **kwargs) for index in range(self.shard_count)]
+
+    async def dispose(self):
+        for shard_engine in self._engines.values():
+            await shard_engine.dispose()
+        self._engines.clear()
+        self._sessionmakers.clear()
+
+
+# Default router (disabled unless STORAGE_CONFIG['sharding'] is set)
+shard_router = ShardRouter()
+
+def get_sync_engines(**kwargs) -> List:
+    """Synchronous engines holding insurance records: the shards, or the main database"""
+    if shard_router.enabled:
+        return shard_router.sync_engines(**kwargs)
+    return [get_sync_engine(**kwargs)]
+
 async def get_db():
     """Dependency for getting async DB session"""
     async with AsyncSessionLocal() as session:
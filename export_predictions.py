@@ -0,0 +1,59 @@
+# export_predictions.py
+import argparse
+import sys
+from datetime import datetime
+
+from core.config import EXPORT_CONFIG
+from service.export import export_predictions, export_name, EXPORT_FORMATS
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Export prediction results joined to insurance records to compressed files"
+    )
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--start-date", type=datetime.fromisoformat, help="Predictions created at or after (ISO date)")
+    parser.add_argument("--end-date", type=datetime.fromisoformat, help="Predictions created before (ISO date)")
+    parser.add_argument("--model-version", help="Only predictions from this model version")
+    parser.add_argument("--source", help="Only records from this source ('original', 'prediction', ...)")
+    parser.add_argument("--name", help="Export name (default: derived from format and filters)")
+    parser.add_argument("--directory", default=EXPORT_CONFIG['directory'], help="Output directory")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CONFIG['chunk_size'])
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> bool:
+    args = parse_args(argv)
+    filters = {
+        'start_date': args.start_date,
+        'end_date': args.end_date,
+        'model_version': args.model_version,
+        'source': args.source
+    }
+    filters = {key: value for key, value in filters.items() if value is not None}
+    name = args.name or export_name(args.format, filters)
+
+    def report(state):
+        progress = state.get('progress')
+        percent = f" ({progress:.0%})" if progress is not None else ""
+        print(f"✅ {state['rows_written']:,} rows exported{percent}", flush=True)
+
+    print(f"🚀 Exporting predictions as '{name}'...")
+    state = export_predictions(
+        name, args.format, filters,
+        directory=args.directory,
+        chunk_size=args.chunk_size,
+        resume=not args.restart,
+        progress=report
+    )
+    print(f"✅ Export completed: {state['rows_written']:,} rows -> {state['path']}")
+    return True
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(0 if main() else 1)
+    except Exception as e:
+        print(f"❌ Export failed: {e}")
+        sys.exit(1)
@@ -2,15 +2,35 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from core.config import API_CONFIG
+from core.drift import drift_monitor
+from core.executor import inference_executor, training_executor
+from database.models import ModelMetadata
+from database.session import engine, shard_router, add_missing_columns
+from utils.profiling import install_profiling
+from service.scheduler import retrain_scheduler
 
 
 from routes import prediction
 from routes import retrain
+from routes import drift
+from routes import health
+from routes import profiling
+from routes import export
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Columns added to model_metadata since the database was created
+    async with engine.begin() as conn:
+        await conn.run_sync(add_missing_columns, ModelMetadata.__table__)
+    drift_monitor.load()
+    retrain_scheduler.start()
     yield
+    await retrain_scheduler.stop()
+    drift_monitor.checkpoint()
+    inference_executor.shutdown()
+    training_executor.shutdown()
+    await shard_router.dispose()
 
 
 app = FastAPI(
@@ -36,9 +56,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in request profiling (no-op unless PROFILING_CONFIG['enabled'])
+install_profiling(app)
+
 # Include routers
 app.include_router(prediction.router)
 app.include_router(retrain.router)
+app.include_router(drift.router)
+app.include_router(health.router)
+app.include_router(profiling.router)
+app.include_router(export.router)
 
 @app.get("/")
 def root():
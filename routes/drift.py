@@ -0,0 +1,15 @@
+"""Drift monitoring router for Medical Cost Prediction API"""
+
+from fastapi import APIRouter
+from schema.drift import DriftResponse
+from service.drift import get_drift_report
+
+router = APIRouter(prefix="/api/v1", tags=["Monitoring"])
+
+@router.get("/drift", response_model=DriftResponse)
+async def drift_endpoint():
+    """
+    Report distribution drift of incoming inputs and predicted charges
+    against the profile of the data the current model was trained on.
+    """
+    return get_drift_report()
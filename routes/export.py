@@ -0,0 +1,49 @@
+"""Prediction export router for Medical Cost Prediction API"""
+
+import os
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import FileResponse
+from schema.export import ExportRequest, ExportStatus
+from service.export import export_jobs, export_name
+from utils.logger import logger
+
+router = APIRouter(prefix="/api/v1", tags=["Export"])
+
+@router.post("/exports", response_model=ExportStatus, status_code=status.HTTP_202_ACCEPTED)
+async def start_export_endpoint(export_request: ExportRequest):
+    """
+    Start streaming prediction results joined to their insurance records to a
+    compressed file. Posting the same request again resumes an interrupted export.
+    """
+    filters = export_request.model_dump(exclude={'format', 'name'}, exclude_none=True)
+    name = export_request.name or export_name(export_request.format, filters)
+
+    if not name.replace("-", "").replace("_", "").isalnum():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Export name must be alphanumeric")
+    if export_jobs.is_running(name):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Export '{name}' is already running")
+
+    logger.info(f"Export '{name}' requested with filters {filters}")
+    return ExportStatus(**export_jobs.start(name, export_request.format, filters))
+
+@router.get("/exports/{name}", response_model=ExportStatus)
+async def export_status_endpoint(name: str):
+    """
+    Progress of an export job
+    """
+    job = export_jobs.get(name)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export not found")
+    return ExportStatus(**{'status': 'running', **job})
+
+@router.get("/exports/{name}/download")
+async def export_download_endpoint(name: str):
+    """
+    Download a completed CSV export
+    """
+    job = export_jobs.get(name)
+    if job is None or job.get('status') != 'completed':
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No completed export with this name")
+    if job['format'] != 'csv' or not os.path.isfile(job['path']):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only CSV exports can be downloaded")
+    return FileResponse(job['path'], media_type="application/gzip", filename=os.path.basename(job['path']))
@@ -0,0 +1,23 @@
+"""Health and load metrics router for Medical Cost Prediction API"""
+
+from typing import List
+from fastapi import APIRouter
+from schema.health import HealthResponse, ExecutorStats
+from core.executor import inference_executor, training_executor
+
+router = APIRouter(tags=["Health"])
+
+@router.get("/health", response_model=HealthResponse)
+async def health_endpoint():
+    """
+    Liveness check. Served directly on the event loop, so it keeps
+    answering while inference or retraining saturate the executors.
+    """
+    return HealthResponse()
+
+@router.get("/api/v1/executors", response_model=List[ExecutorStats])
+async def executor_stats_endpoint():
+    """
+    Queue depth, service time and rejection counters of the CPU executors
+    """
+    return [ExecutorStats(**executor.stats()) for executor in (inference_executor, training_executor)]
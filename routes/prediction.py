@@ -2,37 +2,53 @@
 Prediction router for Medical Cost Prediction API
 """
 
-from fastapi import APIRouter, HTTPException, status
-from schema.prediction import InsuranceInput, PredictionResponse
+import orjson
+import pandas as pd
+from fastapi import APIRouter, HTTPException, Request, status
+from schema.prediction import InsuranceInput, PredictionResponse, BatchPredictionResponse
 from  utils.logger import logger
-from service.prediction import save_prediction_with_data
+from utils.serialization import (
+    negotiate, render_row, render_columns, ROW_MEDIA_TYPES, COLUMNAR_MEDIA_TYPES,
+    MSGPACK_MEDIA_TYPE, ARROW_MEDIA_TYPE
+)
+from service.prediction import save_prediction_with_data, save_batch_predictions
+from core.config import PREDICTION_CONFIG
+from core.validation import InputValidationError
 from database.session import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
 
 router = APIRouter(prefix="/api/v1", tags=["Prediction"])
 
+BINARY_RESPONSES = {
+    200: {"content": {MSGPACK_MEDIA_TYPE: {}, ARROW_MEDIA_TYPE: {}}}
+}
 
 
-@router.post("/predict", response_model=PredictionResponse)
-async def predict_endpoint(input_data: InsuranceInput, db: AsyncSession = Depends(get_db)):
+@router.post("/predict", response_model=PredictionResponse,
+             responses={200: {"content": {MSGPACK_MEDIA_TYPE: {}}}})
+async def predict_endpoint(request: Request, input_data: InsuranceInput, db: AsyncSession = Depends(get_db)):
     """
     Predict medical insurance cost based on beneficiary features
-    
+
     This endpoint accepts beneficiary features and returns a predicted
-    medical insurance cost.
+    medical insurance cost. Responds with JSON by default or MessagePack
+    when requested through the Accept header.
     """
+    # Before predicting, so a 406 never leaves a saved record behind
+    media_type = negotiate(request, ROW_MEDIA_TYPES)
+
     try:
         logger.info("Prediction request received")
-        
+
         # Make prediction
-        predicted_charges = await save_prediction_with_data(input_data, db)           
+        predicted_charges = await save_prediction_with_data(input_data, db)
 
         # Prepare and return response
-        return PredictionResponse(
-            predicted_charges=predicted_charges,
-            status="success"
-        )
+        return render_row(media_type, {
+            "predicted_charges": predicted_charges,
+            "status": "success"
+        })
 
     except ValueError as e:
         logger.error(f"Validation error in prediction: {e}")
@@ -40,4 +56,81 @@ async def predict_endpoint(input_data: InsuranceInput, db: AsyncSession = Depend
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Input validation error: {str(e)}"
         )
-    
\ No newline at end of file
+
+
+BATCH_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": {
+            "oneOf": [
+                {"type": "array", "items": {"$ref": "#/components/schemas/InsuranceInput"}},
+                {"type": "object", "description": "Column arrays keyed by feature name",
+                 "additionalProperties": {"type": "array"}}
+            ]
+        }}}
+    }
+}
+
+
+@router.post("/predict/batch", response_model=BatchPredictionResponse,
+             responses=BINARY_RESPONSES, openapi_extra=BATCH_REQUEST_BODY)
+async def predict_batch_endpoint(
+    request: Request,
+    is_training_data: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Predict medical insurance costs for a batch of beneficiaries
+
+    The body is either a list of InsuranceInput objects or an object of
+    column arrays (``{"age": [...], "sex": [...], ...}``). Inputs are
+    validated column by column; if any row is invalid the whole batch is
+    rejected with 422 and a row-indexed error report.
+
+    Results are returned as columns (``record_id``, ``predicted_charges``)
+    encoded straight from the prediction arrays: JSON by default, or
+    MessagePack / Arrow IPC when requested through the Accept header.
+    """
+    media_type = negotiate(request, COLUMNAR_MEDIA_TYPES)
+
+    try:
+        payload = orjson.loads(await request.body())
+        if isinstance(payload, list):
+            input_df = pd.DataFrame.from_records(payload)
+        elif isinstance(payload, dict):
+            input_df = pd.DataFrame(payload)
+        else:
+            raise ValueError("Body must be a list of rows or an object of columns")
+    except (orjson.JSONDecodeError, ValueError, TypeError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid batch body: {e}")
+
+    if input_df.empty:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty batch")
+    if len(input_df) > PREDICTION_CONFIG['max_batch_size']:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch too large (max {PREDICTION_CONFIG['max_batch_size']} rows)"
+        )
+
+    try:
+        logger.info(f"Batch prediction request received ({len(input_df)} rows)")
+
+        record_ids, predicted_charges = await save_batch_predictions(db, input_df, is_training_data)
+
+        return render_columns(
+            media_type,
+            {'record_id': record_ids, 'predicted_charges': predicted_charges},
+            {'status': 'success', 'count': len(record_ids)}
+        )
+
+    except InputValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail={'message': str(e), 'invalid_rows': e.invalid_rows, 'errors': e.errors}
+        )
+    except ValueError as e:
+        logger.error(f"Validation error in batch prediction: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Input validation error: {str(e)}"
+        )
@@ -0,0 +1,37 @@
+"""Request profiling router for Medical Cost Prediction API"""
+
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from core.config import PROFILING_CONFIG
+from schema.profiling import ProfileListResponse
+from utils.profiling import list_profiles, profile_path, summary
+
+router = APIRouter(prefix="/api/v1", tags=["Profiling"])
+
+@router.get("/profiles", response_model=ProfileListResponse)
+async def list_profiles_endpoint(
+    limit: int = Query(20, ge=1, le=PROFILING_CONFIG['max_profiles']),
+    slowest: int = Query(10, ge=1, le=PROFILING_CONFIG['max_profiles'])
+):
+    """
+    List the most recent request profiles and the slowest ones on disk
+    """
+    profiles = [summary(data) for data in list_profiles()]
+    return ProfileListResponse(
+        enabled=PROFILING_CONFIG['enabled'],
+        total=len(profiles),
+        recent=profiles[:limit],
+        slowest=sorted(profiles, key=lambda data: data['duration_ms'], reverse=True)[:slowest]
+    )
+
+@router.get("/profiles/{profile_id}")
+async def get_profile_endpoint(profile_id: str, format: str = Query("json", pattern="^(json|prof)$")):
+    """
+    Return a profile's metadata (SQL timings, top functions) or its raw cProfile dump
+    """
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    if format == "prof":
+        return FileResponse(path, media_type="application/octet-stream", filename=path.name)
+    return FileResponse(path.with_suffix(".json"), media_type="application/json")
@@ -1,9 +1,10 @@
 """Model retraining router for Medical Cost Prediction API"""
 
 from fastapi import APIRouter, HTTPException, status
-from schema.retrain import RetrainResponse
+from schema.retrain import RetrainResponse, RetrainScheduleResponse
 from utils.logger import logger
 from service.retrain import retrain_model
+from service.scheduler import retrain_scheduler
 from database.session import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
@@ -11,18 +12,29 @@ from fastapi import Depends
 router = APIRouter(prefix="/api/v1", tags=["Retrain"])
 
 @router.post("/retrain", response_model=RetrainResponse)
-async def retrain_endpoint(db: AsyncSession = Depends(get_db)):
+async def retrain_endpoint(require_improvement: bool = False, db: AsyncSession = Depends(get_db)):
     """
     Retrain the medical cost prediction model with all the data stored in database.
-    Uses a LinearRegression by default.
+    Uses a LinearRegression by default. With ``require_improvement`` the new
+    model is only promoted if it does not regress against the served model.
     """
     try:
         logger.info("Retraining request received.")
 
-        return await retrain_model(db)
+        return await retrain_model(db, require_improvement=require_improvement)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Unexpected error during retraining: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Unexpected error during retraining"
-        )
\ No newline at end of file
+        )
+
+@router.get("/retrain/schedule", response_model=RetrainScheduleResponse)
+async def retrain_schedule_endpoint():
+    """
+    Status of the automatic retraining scheduler: last check, last trigger
+    and the number of training rows added since the latest model.
+    """
+    return RetrainScheduleResponse(**retrain_scheduler.status())
@@ -0,0 +1,21 @@
+from typing import Dict, Optional
+from pydantic import BaseModel
+
+class FeatureDrift(BaseModel):
+    """
+    Drift scores for a single feature
+    """
+    psi: Optional[float] = None     # None while there are too few live samples
+    ks: Optional[float] = None
+    drifted: bool
+
+class DriftResponse(BaseModel):
+    """
+    Response model for drift endpoint
+    """
+    status: str
+    live_samples: int
+    reference_samples: int
+    psi_threshold: float
+    features: Dict[str, FeatureDrift]
+    last_checkpoint: Optional[str] = None
@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Literal, Optional
+from pydantic import BaseModel
+
+class ExportRequest(BaseModel):
+    """
+    Request model for starting an export of prediction results
+    """
+    format: Literal['csv', 'parquet'] = 'csv'
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    model_version: Optional[str] = None
+    source: Optional[str] = None
+    name: Optional[str] = None   # defaults to a name derived from format and filters
+
+class ExportStatus(BaseModel):
+    """
+    Response model for export job status
+    """
+    name: str
+    format: str
+    status: str
+    path: str
+    rows_written: int = 0
+    last_id: int = 0
+    progress: Optional[float] = None
+    error: Optional[str] = None
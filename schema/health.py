@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+
+class HealthResponse(BaseModel):
+    """
+    Response model for health endpoint
+    """
+    status: str = "ok"
+
+class ExecutorStats(BaseModel):
+    """
+    Queue depth and admission counters of a CPU offload executor
+    """
+    name: str
+    max_workers: int
+    max_queue_depth: int
+    in_flight: int
+    queue_depth: int
+    avg_service_seconds: float
+    estimated_wait_seconds: float
+    submitted: int
+    completed: int
+    failed: int
+    rejected: int
@@ -1,12 +1,19 @@
-from pydantic import BaseModel
+from typing import List, Literal
+from pydantic import BaseModel, Field
+from core.config import CATEGORY_DOMAINS, NUMERIC_RANGES
+
+# Same rules as the columnar validator in core.validation
+Sex = Literal[tuple(CATEGORY_DOMAINS['sex'])]
+Smoker = Literal[tuple(CATEGORY_DOMAINS['smoker'])]
+Region = Literal[tuple(CATEGORY_DOMAINS['region'])]
 
 class InsuranceInput(BaseModel):
-    age: int 
-    sex: str 
-    bmi: float 
-    children: int 
-    smoker: str 
-    region: str
+    age: int = Field(ge=NUMERIC_RANGES['age'][0], le=NUMERIC_RANGES['age'][1])
+    sex: Sex
+    bmi: float = Field(ge=NUMERIC_RANGES['bmi'][0], le=NUMERIC_RANGES['bmi'][1])
+    children: int = Field(ge=NUMERIC_RANGES['children'][0], le=NUMERIC_RANGES['children'][1])
+    smoker: Smoker
+    region: Region
     is_training_data: bool = False
 
 class PredictionResponse(BaseModel):
@@ -14,4 +21,13 @@ class PredictionResponse(BaseModel):
     Response model for prediction endpoint
     """
     predicted_charges: float
-    status: str = "success"
\ No newline at end of file
+    status: str = "success"
+
+class BatchPredictionResponse(BaseModel):
+    """
+    Response model for batch prediction endpoint (JSON representation)
+    """
+    status: str = "success"
+    count: int
+    record_id: List[int]
+    predicted_charges: List[float]
@@ -0,0 +1,25 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+class ProfileSummary(BaseModel):
+    """
+    Metadata of a stored request profile
+    """
+    id: str
+    route: str
+    method: str
+    path: str
+    status_code: Optional[int] = None
+    started_at: str
+    duration_ms: float
+    sql_count: int
+    sql_total_ms: float
+
+class ProfileListResponse(BaseModel):
+    """
+    Response model for profile listing endpoint
+    """
+    enabled: bool
+    total: int
+    recent: List[ProfileSummary]
+    slowest: List[ProfileSummary]
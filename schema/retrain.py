@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel
 
 class RetrainResponse(BaseModel):
@@ -5,8 +6,24 @@ class RetrainResponse(BaseModel):
     Response model for retraining endpoint
     """
     message: str        
+    promoted: bool = True
+    model_version: Optional[str] = None   # archived version of the promoted model
     r2_score: float     
     rmse: float         
     training_samples: int 
     test_samples: int   
-    timestamp: str      
+    timestamp: str
+
+class RetrainScheduleResponse(BaseModel):
+    """
+    Response model for automatic retraining status endpoint
+    """
+    enabled: bool
+    running: bool
+    last_check: Optional[str] = None
+    last_trigger: Optional[str] = None
+    last_trigger_reason: Optional[str] = None
+    last_result: Optional[str] = None
+    watermark: Optional[str] = None
+    new_rows: Optional[int] = None
+    last_rejected: Optional[str] = None   # retrain newer than the served model that was not promoted
@@ -4,7 +4,7 @@ import pandas as pd
 from pathlib import Path
 from sqlalchemy import text
 
-from database.session import AsyncSessionLocal, Base, engine, get_db
+from database.session import AsyncSessionLocal, Base, engine, get_db, shard_router
 from database.models import InsuranceRecord  
 
 CSV_FILE = Path("data/insurance.csv")  
@@ -20,6 +20,34 @@ async def create_tables():
     """Table creation is now handled by create_tables.py"""
     return True 
      
+def to_record(row: dict) -> InsuranceRecord:
+    """Build an InsuranceRecord from a CSV row-dict."""
+    return InsuranceRecord(
+        age=int(row["age"]),
+        sex=str(row["sex"]),
+        bmi=float(row["bmi"]),
+        children=int(row["children"]),
+        smoker=str(row["smoker"]),
+        region=str(row["region"]),
+        charges=float(row["charges"]) if pd.notna(row["charges"]) else None,
+        is_training_data=True,
+        source="original",
+    )
+
+async def seed_shards(rows: list[dict]) -> bool:
+    """Insert CSV rows into the insurance_records table of their shard."""
+    shards = shard_router.route_many([row["region"] for row in rows])
+
+    async def seed_shard(session, index):
+        shard_rows = [row for row, shard in zip(rows, shards) if shard == index]
+        session.add_all([to_record(row) for row in shard_rows])
+        await session.commit()
+        print(f"✅ Seeded {len(shard_rows)} records into shard {shard_router.names[index]}")
+
+    await shard_router.gather(seed_shard)
+    print(f"✅ Successfully seeded {len(rows)} insurance records")
+    return True
+
 async def seed_insurance_records():
     """Insert CSV rows into insurance_records with proper transaction handling."""
     try:
@@ -27,6 +55,9 @@ async def seed_insurance_records():
         if not rows:
             print("⚠️ No data to seed")
             return False
+
+        if shard_router.enabled:
+            return await seed_shards(rows)
             
         async with AsyncSessionLocal() as session:
             try:
@@ -40,17 +71,7 @@ async def seed_insurance_records():
                 # Insert records
                 for i, row in enumerate(rows, 1):
                     try:
-                        rec = InsuranceRecord(
-                            age=int(row["age"]),
-                            sex=str(row["sex"]),
-                            bmi=float(row["bmi"]),
-                            children=int(row["children"]),
-                            smoker=str(row["smoker"]),
-                            region=str(row["region"]),
-                            charges=float(row["charges"]) if pd.notna(row["charges"]) else None,
-                            is_training_data=True,
-                            source="original",
-                        )
+                        rec = to_record(row)
                         session.add(rec)
                         # Commit in batches of 50
                         if i % 50 == 0:
@@ -0,0 +1,315 @@
+"""Re-scoring backfill for Medical Cost Prediction API
+
+Scores historical ``insurance_records`` with an archived model version and
+bulk inserts the results as ``prediction_results`` tagged with that
+version. Records are read in keyset-paginated chunks, scored in worker
+processes that each load the model once, and written in short,
+rate-limited transactions so live prediction writes keep getting the
+SQLite write lock.
+
+Progress (the last record id of every shard, or of the single database)
+is checkpointed after every chunk, so an interrupted backfill resumes
+where it stopped and a completed one only scores records added since.
+Records that already have a prediction for the version are skipped, so
+re-running never writes duplicates.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, insert, select
+
+from core.config import BACKFILL_CONFIG, NUMERICAL_FEATURES, CATEGORICAL_FEATURES
+from core.inference import list_model_versions, model_version_path
+from database.models import InsuranceRecord, PredictionResult
+from database.session import get_sync_engines
+from service.export import write_checkpoint
+from utils.logger import logger
+
+FEATURES = NUMERICAL_FEATURES + CATEGORICAL_FEATURES
+
+# Model loaded once per worker process by _init_worker
+_worker_model = None
+
+
+def backfill_name(model_version: str, filters: Dict[str, Any]) -> str:
+    """Deterministic backfill name for a version and filter set, so re-running it resumes"""
+    key = json.dumps(filters, sort_keys=True, default=str)
+    return f"backfill_{model_version}_{hashlib.sha256(key.encode()).hexdigest()[:12]}"
+
+
+def resolve_model_path(model_version: str, model_path: Optional[str] = None) -> str:
+    """Model file to score with: an explicit path or the archived version"""
+    path = model_path or model_version_path(model_version)
+    if not os.path.exists(path):
+        available = ", ".join(list_model_versions()) or "none"
+        raise FileNotFoundError(f"Model version '{model_version}' is not archived (available: {available})")
+    return path
+
+
+def _init_worker(model_path: str):
+    global _worker_model
+    _worker_model = joblib.load(model_path)
+
+
+def score_chunk(features: pd.DataFrame) -> np.ndarray:
+    """Predict charges for a chunk of records with the worker's model"""
+    columns = list(getattr(_worker_model, 'feature_names_in_', FEATURES))
+    return np.asarray(_worker_model.predict(features[columns]), dtype=np.float64)
+
+
+def _filtered(query, filters: Dict[str, Any]):
+    if filters.get('start_date') is not None:
+        query = query.where(InsuranceRecord.created_at >= filters['start_date'])
+    if filters.get('end_date') is not None:
+        query = query.where(InsuranceRecord.created_at < filters['end_date'])
+    if filters.get('source') is not None:
+        query = query.where(InsuranceRecord.source == filters['source'])
+    if filters.get('is_training_data') is not None:
+        query = query.where(InsuranceRecord.is_training_data == filters['is_training_data'])
+    return query
+
+
+def iter_record_chunks(
+    engine,
+    model_version: str,
+    filters: Dict[str, Any],
+    after_id: int = 0,
+    chunk_size: int = BACKFILL_CONFIG['chunk_size']
+) -> Iterator[Tuple[int, int, pd.DataFrame]]:
+    """
+    Yield filtered records in id order, one keyset page at a time, without
+    those already scored by the model version
+
+    Args:
+        engine: Synchronous SQLAlchemy engine
+        model_version: Version whose existing predictions are skipped
+        filters: start_date, end_date, source and is_training_data (all optional)
+        after_id: Only records with a larger id are returned
+        chunk_size: Records per page
+
+    Yields:
+        Tuple[int, int, pd.DataFrame]: Last record id of the page, records read
+            and the id and feature columns of the records still to score
+    """
+    columns = [InsuranceRecord.id] + [getattr(InsuranceRecord, feature) for feature in FEATURES]
+
+    while True:
+        query = _filtered(
+            select(*columns).where(InsuranceRecord.id > after_id),
+            filters
+        ).order_by(InsuranceRecord.id).limit(chunk_size)
+
+        with engine.connect() as conn:
+            rows = conn.execute(query).all()
+            if not rows:
+                return
+            first_id, last_id = rows[0][0], rows[-1][0]
+            scored = conn.execute(
+                select(PredictionResult.record_id)
+                .where(PredictionResult.record_id.between(first_id, last_id))
+                .where(PredictionResult.model_version == model_version)
+            ).scalars().all()
+
+        chunk = pd.DataFrame.from_records(rows, columns=['id'] + FEATURES)
+        if scored:
+            chunk = chunk[~chunk['id'].isin(scored)]
+        yield last_id, len(rows), chunk
+
+        if len(rows) < chunk_size:
+            return
+        after_id = last_id
+
+
+def _iter_shard_chunks(engines, model_version: str, filters: Dict[str, Any], last_ids, chunk_size: int):
+    """Chain the record chunks of every shard, tagged with (shard index, last record id)"""
+    for index, engine in enumerate(engines):
+        for last_id, n_read, chunk in iter_record_chunks(engine, model_version, filters, last_ids[index], chunk_size):
+            yield (index, last_id), n_read, chunk
+
+
+def _score_chunks(chunks, model_path: str, workers: int):
+    """Score chunks in order, in a process pool with a bounded window"""
+    if workers <= 1:
+        _init_worker(model_path)
+        for position, n_read, chunk in chunks:
+            yield position, n_read, chunk, score_chunk(chunk) if len(chunk) else np.empty(0)
+        return
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path,))
+    try:
+        pending = deque()
+        for position, n_read, chunk in chunks:
+            future = pool.submit(score_chunk, chunk) if len(chunk) else None
+            pending.append((position, n_read, chunk, future))
+            if len(pending) >= 2 * workers:
+                position, n_read, chunk, future = pending.popleft()
+                yield position, n_read, chunk, future.result() if future else np.empty(0)
+        while pending:
+            position, n_read, chunk, future = pending.popleft()
+            yield position, n_read, chunk, future.result() if future else np.empty(0)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+class _Throttle:
+    """Caps the write rate and pauses between write transactions"""
+
+    def __init__(self, max_rows_per_second: Optional[float], pause_seconds: float):
+        self.max_rows_per_second = max_rows_per_second
+        self.pause_seconds = pause_seconds
+        self.started = time.monotonic()
+        self.rows = 0
+
+    def wait(self, rows: int):
+        self.rows += rows
+        delay = self.pause_seconds
+        if self.max_rows_per_second:
+            ahead = self.rows / self.max_rows_per_second - (time.monotonic() - self.started)
+            delay = max(delay, ahead)
+        if delay > 0:
+            time.sleep(delay)
+
+
+def write_predictions(
+    engine,
+    model_version: str,
+    record_ids: np.ndarray,
+    predicted_charges: np.ndarray,
+    throttle: _Throttle,
+    batch_size: int = BACKFILL_CONFIG['write_batch_size']
+):
+    """Bulk insert prediction results in short, throttled transactions"""
+    for start in range(0, len(record_ids), batch_size):
+        rows = [
+            {'record_id': record_id, 'predicted_charges': charges, 'model_version': model_version}
+            for record_id, charges in zip(
+                record_ids[start:start + batch_size].tolist(),
+                predicted_charges[start:start + batch_size].tolist()
+            )
+        ]
+        with engine.begin() as conn:
+            conn.execute(insert(PredictionResult), rows)
+        throttle.wait(len(rows))
+
+
+def _progress(last_ids, id_ranges) -> float:
+    """Fraction of the record ID range covered, averaged over shards"""
+    fractions = []
+    for last_id, (min_id, max_id) in zip(last_ids, id_ranges):
+        if min_id is None or last_id >= max_id:
+            fractions.append(1.0)
+        else:
+            fractions.append(max(0, last_id - min_id + 1) / (max_id - min_id + 1))
+    return round(sum(fractions) / len(fractions), 4)
+
+
+def backfill_predictions(
+    model_version: str,
+    filters: Optional[Dict[str, Any]] = None,
+    model_path: Optional[str] = None,
+    workers: int = BACKFILL_CONFIG['workers'],
+    chunk_size: int = BACKFILL_CONFIG['chunk_size'],
+    max_rows_per_second: Optional[float] = BACKFILL_CONFIG['max_rows_per_second'],
+    directory: str = BACKFILL_CONFIG['directory'],
+    resume: bool = True,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    engine=None
+) -> Dict[str, Any]:
+    """
+    Score historical records with a model version and store the predictions
+
+    Args:
+        model_version: Version the new prediction results are tagged with
+        filters: start_date, end_date, source and is_training_data (all optional)
+        model_path: Model file to use instead of the archived version
+        workers: Scoring processes (1 scores in-process)
+        chunk_size: Records per keyset page
+        max_rows_per_second: Write rate limit (None for unlimited)
+        directory: Checkpoint directory
+        resume: Continue from an existing checkpoint with the same filters
+        progress: Called with the backfill state after every chunk
+        engine: Synchronous engine (defaults to the main database, or every
+            shard if storage is sharded)
+
+    Returns:
+        Dict[str, Any]: Final backfill state (rows_written, rows_skipped, completed, ...)
+    """
+    model_path = resolve_model_path(model_version, model_path)
+    filters = {key: value for key, value in (filters or {}).items() if value is not None}
+    normalized_filters = json.loads(json.dumps(filters, default=str))
+    name = backfill_name(model_version, filters)
+
+    os.makedirs(directory, exist_ok=True)
+    checkpoint_path = os.path.join(directory, f"{name}.checkpoint.json")
+
+    state = None
+    if resume and os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            state = json.load(f)
+        # A completed backfill picks up records added since it finished
+        state['completed'] = False
+        logger.info(f"Resuming backfill '{name}' after record ids {state['last_ids']}")
+
+    own_engine = engine is None
+    engines = (get_sync_engines(connect_args={'timeout': BACKFILL_CONFIG['busy_timeout_seconds']})
+               if own_engine else [engine])
+    if state is None:
+        state = {
+            'name': name, 'model_version': model_version, 'filters': normalized_filters,
+            'last_ids': [0] * len(engines), 'rows_read': 0, 'rows_written': 0, 'rows_skipped': 0,
+            'completed': False, 'started_at': datetime.utcnow().isoformat() + "Z"
+        }
+    if len(state['last_ids']) != len(engines):
+        raise ValueError(f"Checkpoint for backfill '{name}' was created with a different shard layout")
+
+    try:
+        id_ranges = []
+        for shard_engine in engines:
+            # Needed to skip already scored records without a table scan per chunk
+            with shard_engine.begin() as conn:
+                for index in PredictionResult.__table__.indexes:
+                    index.create(conn, checkfirst=True)
+                id_ranges.append(conn.execute(
+                    select(func.min(InsuranceRecord.id), func.max(InsuranceRecord.id))
+                ).one())
+
+        throttle = _Throttle(max_rows_per_second, BACKFILL_CONFIG['pause_seconds'])
+        chunks = _iter_shard_chunks(engines, model_version, filters, list(state['last_ids']), chunk_size)
+
+        for (shard, last_id), n_read, chunk, predicted_charges in _score_chunks(chunks, model_path, workers):
+            write_predictions(engines[shard], model_version, chunk['id'].to_numpy(), predicted_charges, throttle)
+            state['last_ids'][shard] = int(last_id)
+            state['rows_read'] += n_read
+            state['rows_written'] += len(chunk)
+            state['rows_skipped'] += n_read - len(chunk)
+            state['progress'] = _progress(state['last_ids'], id_ranges)
+            write_checkpoint(checkpoint_path, state)
+            if progress:
+                progress(dict(state))
+    finally:
+        if own_engine:
+            for shard_engine in engines:
+                shard_engine.dispose()
+
+    state['completed'] = True
+    state['progress'] = 1.0
+    state['finished_at'] = datetime.utcnow().isoformat() + "Z"
+    write_checkpoint(checkpoint_path, state)
+    if progress:
+        progress(dict(state))
+
+    logger.info(
+        f"Backfill '{name}' completed: {state['rows_written']} predictions written, "
+        f"{state['rows_skipped']} already scored"
+    )
+    return state
@@ -0,0 +1,51 @@
+"""Drift reporting service for Medical Cost Prediction API"""
+
+from fastapi import HTTPException, status
+from core.config import DRIFT_CONFIG
+from core.drift import drift_monitor, compare_profiles
+from schema.drift import DriftResponse, FeatureDrift
+from utils.logger import logger
+
+
+def get_drift_report() -> DriftResponse:
+    """
+    Compare the live prediction profile with the reference training profile
+
+    Returns:
+        DriftResponse: PSI/KS scores per feature and an overall status
+    """
+    reference, live = drift_monitor.snapshot()
+
+    if reference is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No reference profile found, retrain the model to create one"
+        )
+
+    threshold = DRIFT_CONFIG['psi_threshold']
+    scores = compare_profiles(reference, live)
+
+    if live.count < DRIFT_CONFIG['min_live_samples']:
+        # Too few live samples for meaningful histograms (an empty window
+        # compares as uniform), so no feature is scored or flagged
+        report_status = "insufficient_data"
+        features = {name: FeatureDrift(psi=None, ks=None, drifted=False) for name in scores}
+    else:
+        features = {
+            name: FeatureDrift(psi=round(feature['psi'], 4),
+                               ks=None if feature['ks'] is None else round(feature['ks'], 4),
+                               drifted=feature['psi'] > threshold)
+            for name, feature in scores.items()
+        }
+        report_status = "drift" if any(feature.drifted for feature in features.values()) else "ok"
+
+    logger.info(f"Drift report computed: {report_status} ({live.count} live samples)")
+
+    return DriftResponse(
+        status=report_status,
+        live_samples=live.count,
+        reference_samples=reference.count,
+        psi_threshold=threshold,
+        features=features,
+        last_checkpoint=drift_monitor.last_checkpoint
+    )
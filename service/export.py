@@ -0,0 +1,313 @@
+"""Export of prediction results for Medical Cost Prediction API
+
+Streams ``prediction_results`` joined to ``insurance_records`` to compressed
+files in keyset-paginated chunks. Each chunk is read in its own short
+transaction, so memory stays flat and writers are never blocked for longer
+than one page read. Progress is checkpointed next to the output file and an
+interrupted export resumes from the last written chunk. With sharded
+storage the shards are exported one after the other, with prediction and
+record IDs converted to global IDs.
+
+Output formats:
+    csv      <name>.csv.gz, one gzip member per chunk
+    parquet  <name>/part-00000.parquet, ... one file per chunk (requires pyarrow)
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import pandas as pd
+from sqlalchemy import func, select
+
+from core.config import EXPORT_CONFIG
+from database.models import InsuranceRecord, PredictionResult
+from database.session import get_sync_engines, shard_router
+from utils.logger import logger
+
+EXPORT_FORMATS = ('csv', 'parquet')
+
+EXPORT_COLUMNS = [
+    PredictionResult.id.label('prediction_id'),
+    PredictionResult.record_id,
+    PredictionResult.predicted_charges,
+    PredictionResult.model_version,
+    PredictionResult.created_at.label('predicted_at'),
+    InsuranceRecord.age,
+    InsuranceRecord.sex,
+    InsuranceRecord.bmi,
+    InsuranceRecord.children,
+    InsuranceRecord.smoker,
+    InsuranceRecord.region,
+    InsuranceRecord.charges,
+    InsuranceRecord.is_training_data,
+    InsuranceRecord.source,
+    InsuranceRecord.created_at.label('record_created_at'),
+]
+COLUMN_NAMES = [column.key for column in EXPORT_COLUMNS]
+
+
+def export_name(fmt: str, filters: Dict[str, Any]) -> str:
+    """Deterministic export name for a format and filter set, so re-running it resumes"""
+    key = json.dumps({'format': fmt, **filters}, sort_keys=True, default=str)
+    return f"predictions_{hashlib.sha256(key.encode()).hexdigest()[:12]}"
+
+
+def _filtered(query, filters: Dict[str, Any]):
+    if filters.get('start_date') is not None:
+        query = query.where(PredictionResult.created_at >= filters['start_date'])
+    if filters.get('end_date') is not None:
+        query = query.where(PredictionResult.created_at < filters['end_date'])
+    if filters.get('model_version') is not None:
+        query = query.where(PredictionResult.model_version == filters['model_version'])
+    if filters.get('source') is not None:
+        query = query.where(InsuranceRecord.source == filters['source'])
+    return query
+
+
+def iter_prediction_chunks(
+    engine,
+    filters: Dict[str, Any],
+    after_id: int = 0,
+    chunk_size: int = EXPORT_CONFIG['chunk_size']
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield the filtered join in prediction-id order, one keyset page at a time
+
+    Args:
+        engine: Synchronous SQLAlchemy engine
+        filters: start_date, end_date, model_version and source (all optional)
+        after_id: Only rows with a larger prediction id are returned
+        chunk_size: Rows per page
+    """
+    while True:
+        query = _filtered(
+            select(*EXPORT_COLUMNS)
+            .join(InsuranceRecord, PredictionResult.record_id == InsuranceRecord.id)
+            .where(PredictionResult.id > after_id),
+            filters
+        ).order_by(PredictionResult.id).limit(chunk_size)
+
+        with engine.connect() as conn:
+            rows = conn.execute(query).all()
+        if not rows:
+            return
+
+        chunk = pd.DataFrame.from_records(rows, columns=COLUMN_NAMES)
+        after_id = int(chunk['prediction_id'].iat[-1])
+        yield chunk
+
+        if len(rows) < chunk_size:
+            return
+        time.sleep(EXPORT_CONFIG['pause_seconds'])
+
+
+def _id_range(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(func.min(PredictionResult.id), func.max(PredictionResult.id))).one()
+
+
+class _CsvWriter:
+    """Appends gzip members to <name>.csv.gz; the checkpoint holds the committed size"""
+
+    def __init__(self, path: str, state: Dict[str, Any]):
+        self.path = path
+        self.header = state.get('rows_written', 0) == 0
+        # Drop anything written after the last checkpoint
+        if os.path.exists(path):
+            with open(path, "r+b") as f:
+                f.truncate(state.get('bytes_written', 0))
+
+    def write(self, chunk: pd.DataFrame, state: Dict[str, Any]):
+        with gzip.open(self.path, "at", newline="") as f:
+            chunk.to_csv(f, header=self.header, index=False)
+        self.header = False
+        state['bytes_written'] = os.path.getsize(self.path)
+
+
+class _ParquetWriter:
+    """Writes one Parquet file per chunk into <name>/"""
+
+    def __init__(self, path: str, state: Dict[str, Any]):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        # Drop parts written after the last checkpoint (or by an earlier export)
+        for filename in os.listdir(path):
+            if filename.startswith("part-") and int(filename[5:10]) >= state.get('parts_written', 0):
+                os.remove(os.path.join(path, filename))
+
+    def write(self, chunk: pd.DataFrame, state: Dict[str, Any]):
+        part = state.get('parts_written', 0)
+        chunk.to_parquet(os.path.join(self.path, f"part-{part:05d}.parquet"), index=False, compression="zstd")
+        state['parts_written'] = part + 1
+
+
+WRITERS = {'csv': (_CsvWriter, ".csv.gz"), 'parquet': (_ParquetWriter, "")}
+
+
+def output_path(name: str, fmt: str, directory: str = EXPORT_CONFIG['directory']) -> str:
+    return os.path.join(directory, name + WRITERS[fmt][1])
+
+
+def write_checkpoint(path: str, state: Dict[str, Any]):
+    """Atomically replace a JSON checkpoint file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, default=str)
+    os.replace(tmp_path, path)
+
+
+def export_predictions(
+    name: str,
+    fmt: str = 'csv',
+    filters: Optional[Dict[str, Any]] = None,
+    directory: str = EXPORT_CONFIG['directory'],
+    chunk_size: int = EXPORT_CONFIG['chunk_size'],
+    resume: bool = True,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    engine=None
+) -> Dict[str, Any]:
+    """
+    Export predictions joined to their insurance records
+
+    Args:
+        name: Export name; the output and its checkpoint are derived from it
+        fmt: 'csv' (gzip) or 'parquet'
+        filters: start_date, end_date, model_version and source (all optional)
+        directory: Output directory
+        chunk_size: Rows per keyset page
+        resume: Continue from an existing checkpoint with the same filters
+        progress: Called with the export state after every chunk
+        engine: Synchronous engine (defaults to the main database, or every
+            shard in turn if storage is sharded)
+
+    Returns:
+        Dict[str, Any]: Final export state (path, rows_written, completed, ...)
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported export format '{fmt}', expected one of {EXPORT_FORMATS}")
+
+    filters = {key: value for key, value in (filters or {}).items() if value is not None}
+    os.makedirs(directory, exist_ok=True)
+    path = output_path(name, fmt, directory)
+    checkpoint_path = f"{path}.checkpoint.json"
+    normalized_filters = json.loads(json.dumps(filters, default=str))
+
+    state = None
+    if resume and os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            state = json.load(f)
+        if state.get('filters') != normalized_filters or state.get('format') != fmt:
+            raise ValueError(f"Checkpoint for export '{name}' was created with different filters")
+        if state.get('completed'):
+            logger.info(f"Export '{name}' already completed")
+            return state
+        logger.info(f"Resuming export '{name}' after prediction id {state['last_id']}")
+    if state is None:
+        if os.path.exists(path) and fmt == 'csv':
+            os.remove(path)
+        state = {
+            'name': name, 'format': fmt, 'path': path, 'filters': normalized_filters,
+            'shard': 0, 'last_id': 0, 'rows_written': 0, 'completed': False,
+            'started_at': datetime.utcnow().isoformat() + "Z"
+        }
+
+    own_engine = engine is None
+    engines = get_sync_engines() if own_engine else [engine]
+    sharded = own_engine and shard_router.enabled
+    try:
+        writer = WRITERS[fmt][0](path, state)
+
+        # Shards are exported one after the other; (shard, last_id) is the cursor
+        for index in range(state.get('shard', 0), len(engines)):
+            min_id, max_id = _id_range(engines[index])
+
+            for chunk in iter_prediction_chunks(engines[index], filters, state['last_id'], chunk_size):
+                last_id = int(chunk['prediction_id'].iat[-1])
+                if sharded:
+                    chunk['prediction_id'] = shard_router.global_ids(chunk['prediction_id'], index)
+                    chunk['record_id'] = shard_router.global_ids(chunk['record_id'], index)
+                writer.write(chunk, state)
+                state['last_id'] = last_id
+                state['rows_written'] += len(chunk)
+                if max_id and max_id > min_id:
+                    shard_progress = min(1.0, (last_id - min_id + 1) / (max_id - min_id + 1))
+                    state['progress'] = round((index + shard_progress) / len(engines), 4)
+                write_checkpoint(checkpoint_path, state)
+                if progress:
+                    progress(dict(state))
+
+            if index + 1 < len(engines):
+                state.update(shard=index + 1, last_id=0)
+                write_checkpoint(checkpoint_path, state)
+    finally:
+        if own_engine:
+            for shard_engine in engines:
+                shard_engine.dispose()
+
+    state['completed'] = True
+    state['progress'] = 1.0
+    state['finished_at'] = datetime.utcnow().isoformat() + "Z"
+    write_checkpoint(checkpoint_path, state)
+    if progress:
+        progress(dict(state))
+
+    logger.info(f"Export '{name}' completed: {state['rows_written']} rows -> {path}")
+    return state
+
+
+class ExportJobs:
+    """In-process registry of export jobs started through the API"""
+
+    def __init__(self):
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def is_running(self, name: str) -> bool:
+        task = self._tasks.get(name)
+        return task is not None and not task.done()
+
+    def start(self, name: str, fmt: str, filters: Dict[str, Any]) -> Dict[str, Any]:
+        """Run an export in a background thread; re-starting a name resumes it"""
+        self.jobs[name] = {'name': name, 'format': fmt, 'status': 'running',
+                           'path': output_path(name, fmt), 'rows_written': 0, 'progress': 0.0}
+
+        def update(state):
+            self.jobs[name].update(state)
+
+        async def run():
+            try:
+                await asyncio.to_thread(export_predictions, name, fmt, filters, progress=update)
+                self.jobs[name]['status'] = 'completed'
+            except Exception as e:
+                logger.error(f"Export '{name}' failed: {e}")
+                self.jobs[name].update(status='failed', error=str(e))
+
+        self._tasks[name] = asyncio.create_task(run())
+        return self.jobs[name]
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Job state, falling back to the on-disk checkpoint for exports from earlier runs"""
+        if name in self.jobs:
+            return self.jobs[name]
+        for fmt in WRITERS:
+            checkpoint_path = f"{output_path(name, fmt)}.checkpoint.json"
+            if os.path.exists(checkpoint_path):
+                with open(checkpoint_path) as f:
+                    state = json.load(f)
+                state['status'] = 'completed' if state.get('completed') else 'interrupted'
+                return state
+        return None
+
+
+# Default job registry
+export_jobs = ExportJobs()
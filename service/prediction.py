@@ -1,8 +1,15 @@
-from core.inference import load_model, load_preprocessor
+from core.config import DEFAULT_MODEL_VERSION
+from core.inference import load_model, load_preprocessor, model_version_of
+from core.drift import drift_monitor
+from core.executor import inference_executor
+from core.validation import validate_frame, get_category_domains
 from utils.logger import logger
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 from database.models import InsuranceRecord, PredictionResult
+from database.session import shard_router, ShardRouter
+import numpy as np
 import pandas as pd
 
 async def save_insurance_record(
@@ -52,7 +59,7 @@ async def save_prediction_result(
     db: AsyncSession, 
     record_id: int, 
     predicted_charges: float,
-    model_version: str = "1.0"
+    model_version: str = DEFAULT_MODEL_VERSION
     ) -> PredictionResult:
     """
     Save a prediction result to the database
@@ -86,75 +93,250 @@ async def save_prediction_result(
         raise
 
 
+def predict_charges(input_data) -> Tuple[float, str]:
+    """
+    Run the CPU-bound part of a prediction: build the feature frame,
+    call the model and update the drift profile.
+
+    Executed on the inference executor, never on the event loop.
+
+    Args:
+        input_data: Validated insurance input
+
+    Returns:
+        Tuple[float, str]: Predicted medical charges and the version of the
+            model that predicted them
+    """
+    # Load model and preprocessor
+    model = load_model()
+    model_version = model_version_of(model)
+    preprocessor = load_preprocessor()
+
+    # Get the expected feature names from the preprocessor
+    try:
+        # Get the feature names after preprocessing
+        feature_names = preprocessor.get_feature_names_out()
+        logger.info(f"Preprocessor output features: {feature_names}")
+
+        # Get the input feature names that the preprocessor expects
+        input_features = preprocessor.feature_names_in_
+        logger.info(f"Preprocessor input features: {input_features}")
+
+    except AttributeError as e:
+        logger.warning(f"Could not get feature names from preprocessor: {e}")
+        input_features = ['age', 'sex', 'bmi', 'children', 'smoker', 'region']
+
+    # Convert input data to a dictionary with the expected features
+    input_dict = {
+        'age': [input_data.age],
+        'sex': [input_data.sex],
+        'bmi': [input_data.bmi],
+        'children': [input_data.children],
+        'smoker': [input_data.smoker],
+        'region': [input_data.region]
+    }
+
+    # Convert to DataFrame with the exact feature order expected by the preprocessor
+    if hasattr(preprocessor, 'feature_names_in_'):
+        # If preprocessor has feature_names_in_, use that order
+        input_df = pd.DataFrame(input_dict)[list(preprocessor.feature_names_in_)]
+    else:
+        # Otherwise use default order
+        input_df = pd.DataFrame(input_dict)
+
+    logger.info(f"Input DataFrame columns: {input_df.columns.tolist()}")
+    logger.info(f"Input data: {input_df.iloc[0].to_dict()}")
+
+    # Reject categories the fitted encoder would silently encode as all zeros
+    validate_frame(input_df, get_category_domains(preprocessor))
+
+    try:
+        # Make prediction using the full pipeline (preprocessing + model)
+        predicted_charges = model.predict(input_df)
+        logger.info(f"Prediction successful")
+
+    except Exception as e:
+        logger.error(f"Error during prediction: {e}")
+        raise
+
+    # Log prediction details
+    logger.info(f"Predicted charges: {predicted_charges[0]:.2f}")
+
+    # Update the in-memory drift profile
+    drift_monitor.record(input_df.iloc[0].to_dict(), predicted_charges[0])
+
+    return float(predicted_charges[0]), model_version
+
+
+async def save_record_with_prediction(
+    db: AsyncSession,
+    input_data,
+    predicted_charges: float,
+    model_version: str = DEFAULT_MODEL_VERSION
+):
+    """Save the insurance record of a prediction and its prediction result"""
+    record = await save_insurance_record(db=db, data={
+        'age': input_data.age,
+        'sex': input_data.sex,
+        'bmi': input_data.bmi,
+        'children': input_data.children,
+        'smoker': input_data.smoker,
+        'region': input_data.region,
+        'charges': predicted_charges
+    }, is_training_data=input_data.is_training_data)
+
+    await save_prediction_result(
+        db=db, record_id=record.id, predicted_charges=predicted_charges, model_version=model_version
+    )
+    return record
+
+
 async def save_prediction_with_data(input_data, db: AsyncSession):
-    try:        
-        # Load model and preprocessor
-        model = load_model()
-        preprocessor = load_preprocessor()
-        
-        # Get the expected feature names from the preprocessor
-        try:
-            # Get the feature names after preprocessing
-            feature_names = preprocessor.get_feature_names_out()
-            logger.info(f"Preprocessor output features: {feature_names}")
-            
-            # Get the input feature names that the preprocessor expects
-            input_features = preprocessor.feature_names_in_ 
-            logger.info(f"Preprocessor input features: {input_features}")
-            
-        except AttributeError as e:
-            logger.warning(f"Could not get feature names from preprocessor: {e}")
-            input_features = ['age', 'sex', 'bmi', 'children', 'smoker', 'region']
-        
-        # Convert input data to a dictionary with the expected features
-        input_dict = {
-            'age': [input_data.age],
-            'sex': [input_data.sex],
-            'bmi': [input_data.bmi],
-            'children': [input_data.children],
-            'smoker': [input_data.smoker],
-            'region': [input_data.region]
-        }
-        
-        # Convert to DataFrame with the exact feature order expected by the preprocessor
-        if hasattr(preprocessor, 'feature_names_in_'):
-            # If preprocessor has feature_names_in_, use that order
-            input_df = pd.DataFrame(input_dict)[list(preprocessor.feature_names_in_)]
+    try:
+        # Make prediction off the event loop
+        predicted_charges, model_version = await inference_executor.run(predict_charges, input_data)
+
+        # Save the record and prediction result, in the record's shard if
+        # storage is sharded
+        if shard_router.enabled:
+            async with shard_router.session(shard_router.route(input_data.region)) as shard_db:
+                await save_record_with_prediction(shard_db, input_data, predicted_charges, model_version)
         else:
-            # Otherwise use default order
-            input_df = pd.DataFrame(input_dict)
-            
-        logger.info(f"Input DataFrame columns: {input_df.columns.tolist()}")
-        logger.info(f"Input data: {input_df.iloc[0].to_dict()}")
-        
-        try:
-            # Make prediction using the full pipeline (preprocessing + model)
-            predicted_charges = model.predict(input_df)
-            logger.info(f"Prediction successful")
-            
-        except Exception as e:
-            logger.error(f"Error during prediction: {e}")
-            raise
-            
-        # Log prediction details
-        logger.info(f"Predicted charges: {predicted_charges[0]:.2f}")
-        
-        # Save insurance record
-        record = await save_insurance_record(db=db, data={
-            'age': input_data.age,
-            'sex': input_data.sex,
-            'bmi': input_data.bmi,
-            'children': input_data.children,
-            'smoker': input_data.smoker,
-            'region': input_data.region,
-            'charges': predicted_charges[0]
-        }, is_training_data=input_data.is_training_data)
-
-        # Save prediction result
-        await save_prediction_result(db=db, record_id=record.id, predicted_charges=predicted_charges[0])
-        
-        return predicted_charges[0]
+            await save_record_with_prediction(db, input_data, predicted_charges, model_version)
+
+        return predicted_charges
     except Exception as e:
         logger.error(f"Error during prediction: {e}")
         raise
 
+
+def predict_charges_batch(input_df: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray, str]:
+    """
+    Validate a whole batch of inputs column by column, run the model on it
+    and update the drift profile.
+
+    Executed on the inference executor, never on the event loop.
+
+    Args:
+        input_df: DataFrame with one row per beneficiary
+
+    Returns:
+        Tuple[pd.DataFrame, np.ndarray, str]: Validated feature frame, the
+            predicted medical charges (one per input row) and the version of
+            the model that predicted them
+
+    Raises:
+        InputValidationError: If any row breaks the input rules
+    """
+    model = load_model()
+    model_version = model_version_of(model)
+    preprocessor = load_preprocessor()
+
+    input_df = validate_frame(input_df, get_category_domains(preprocessor))
+
+    if hasattr(preprocessor, 'feature_names_in_'):
+        input_df = input_df[list(preprocessor.feature_names_in_)]
+
+    predicted_charges = np.asarray(model.predict(input_df), dtype=np.float64)
+    logger.info(f"Batch prediction successful for {len(predicted_charges)} rows")
+
+    drift_monitor.record_many(input_df, predicted_charges)
+    return input_df, predicted_charges, model_version
+
+
+async def insert_batch(
+    db: AsyncSession,
+    input_df: pd.DataFrame,
+    predicted_charges: np.ndarray,
+    is_training_data: bool = False,
+    model_version: str = DEFAULT_MODEL_VERSION
+) -> np.ndarray:
+    """
+    Bulk insert insurance records and their prediction results in a single
+    transaction
+
+    Returns:
+        np.ndarray: Record IDs in input order
+    """
+    records = input_df.assign(
+        charges=predicted_charges,
+        is_training_data=is_training_data,
+        source="prediction"
+    ).to_dict("records")
+
+    # SQLite assigns ascending rowids in parameter order within one write
+    # transaction, so sorting the returned IDs restores the input order
+    # without falling back to one INSERT per row (sort_by_parameter_order)
+    result = await db.execute(insert(InsuranceRecord).returning(InsuranceRecord.id), records)
+    record_ids = np.sort(np.fromiter(result.scalars(), dtype=np.int64, count=len(records)))
+
+    await db.execute(insert(PredictionResult), [
+        {'record_id': record_id, 'predicted_charges': charges, 'model_version': model_version}
+        for record_id, charges in zip(record_ids.tolist(), predicted_charges.tolist())
+    ])
+    await db.commit()
+    return record_ids
+
+
+async def insert_batch_sharded(
+    input_df: pd.DataFrame,
+    predicted_charges: np.ndarray,
+    is_training_data: bool = False,
+    model_version: str = DEFAULT_MODEL_VERSION,
+    router: ShardRouter = shard_router
+) -> np.ndarray:
+    """
+    Split a batch by shard and insert the parts concurrently, one
+    transaction per shard (a failure in one shard does not undo the others)
+
+    Returns:
+        np.ndarray: Global record IDs in input order
+    """
+    shards = router.route_many(input_df['region'].to_numpy())
+    record_ids = np.empty(len(input_df), dtype=np.int64)
+
+    async def write_shard(shard_db, index):
+        mask = shards == index
+        if mask.any():
+            local_ids = await insert_batch(
+                shard_db, input_df[mask], predicted_charges[mask], is_training_data, model_version
+            )
+            record_ids[mask] = router.global_ids(local_ids, index)
+
+    await router.gather(write_shard)
+    return record_ids
+
+
+async def save_batch_predictions(
+    db: AsyncSession,
+    input_df: pd.DataFrame,
+    is_training_data: bool = False
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Predict charges for a batch of inputs and bulk insert the insurance
+    records and prediction results in a single transaction (one per shard
+    if storage is sharded).
+
+    Args:
+        db: Database session
+        input_df: Raw input rows, validated before prediction
+        is_training_data: Whether the records are training data
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Record IDs and predicted charges
+    """
+    try:
+        input_df, predicted_charges, model_version = await inference_executor.run(predict_charges_batch, input_df)
+
+        if shard_router.enabled:
+            record_ids = await insert_batch_sharded(input_df, predicted_charges, is_training_data, model_version)
+        else:
+            record_ids = await insert_batch(db, input_df, predicted_charges, is_training_data, model_version)
+
+        logger.info(f"Saved {len(record_ids)} batch predictions")
+        return record_ids, predicted_charges
+
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error during batch prediction: {e}")
+        raise
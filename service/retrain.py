@@ -1,51 +1,21 @@
 """Model retraining router for Medical Cost Prediction API"""
 
+import json
 from datetime import datetime
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
-import joblib
-import numpy as np
+from typing import Any, Dict, Optional
+from sklearn.metrics import r2_score, mean_absolute_error
+import pandas as pd
 from utils.logger import logger
 from database.session import AsyncSession
 from schema.retrain import RetrainResponse
-from database.models import InsuranceRecord, ModelMetadata
-from sqlalchemy import select
-from core.config import MODEL_PATH, NUMERICAL_FEATURES, CATEGORICAL_FEATURES, TARGET_FEATURE
-from core.inference import load_preprocessor
+from database.models import ModelMetadata
+from core.config import MODEL_PATH, TARGET_FEATURE, RETRAIN_SCHEDULE_CONFIG, TRAINING_CONFIG
+from core.inference import load_model, archive_model
+from core.training import run_pipeline, export_artifacts, load_database_snapshot, FEATURE_COLUMNS
+from core.drift import drift_monitor, StreamingProfile
+from core.executor import training_executor
 from fastapi import HTTPException, status
 
-async def get_training_data_as_dataframe(db):
-
-    """
-    Get all training data from the database
-
-    Args:
-        db: Database session
-
-    Returns:
-        List[InsuranceRecord]: List of training insurance records
-    """
-    try:
-        record = await db.execute(select(InsuranceRecord).filter(
-            InsuranceRecord.is_training_data == True
-        ))
-
-        records = record.scalars().all()
-
-        if records is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No training data found"
-            )
-            
-        logger.info(f"Retrieved {len(records)} training records")
-        return records
-    except Exception as e:
-        logger.error(f"Error retrieving training data: {e}")
-        raise
-
-
 async def save_model_metadata(
         db: AsyncSession,
         model_type: str,
@@ -54,6 +24,8 @@ async def save_model_metadata(
         mae: float,
         training_samples: int,
         test_samples: int,
+        promoted: bool = True,
+        data_watermark: Optional[Dict[str, Any]] = None
     ) -> ModelMetadata:
         """
         Save model training metadata
@@ -66,6 +38,9 @@ async def save_model_metadata(
             mae: Mean absolute error
             training_samples: Number of training samples
             test_samples: Number of test samples
+            promoted: Whether the model is served (False records a rejected retrain)
+            data_watermark: Snapshot of the training data (``sharding``,
+                per-shard ``last_ids`` and ``loaded_at``)
 
         Returns:
             ModelMetadata: Created model metadata record
@@ -77,8 +52,13 @@ async def save_model_metadata(
                 mse=mse,
                 mae=mae,
                 training_samples=training_samples,
-                test_samples=test_samples
+                test_samples=test_samples,
+                promoted=promoted
             )
+            if data_watermark is not None:
+                model_meta.data_sharding = data_watermark['sharding']
+                model_meta.data_last_ids = json.dumps(data_watermark['last_ids'])
+                model_meta.data_loaded_at = data_watermark['loaded_at']
 
             db.add(model_meta)
             await db.commit()
@@ -92,99 +72,227 @@ async def save_model_metadata(
             logger.error(f"Error saving model metadata: {e}")
             raise
 
-async def retrain_model(db):
+def evaluate_current_model(X_test, y_test):
+    """
+    Score the currently served model on a holdout set
+
+    Args:
+        X_test: Holdout features
+        y_test: Holdout target
+
+    Returns:
+        Optional[Dict[str, float]]: R² and MAE, or None if no usable model is served
+    """
     try:
-        # Get the training data as SQLAlchemy model instances
-        records = await get_training_data_as_dataframe(db)
+        model = load_model()
+        if hasattr(model, 'feature_names_in_'):
+            X_test = X_test[list(model.feature_names_in_)]
+        y_pred = model.predict(X_test)
+        return {'r2': r2_score(y_test, y_pred), 'mae': mean_absolute_error(y_test, y_pred)}
+    except Exception as e:
+        logger.warning(f"Could not evaluate the current model, promoting without comparison: {e}")
+        return None
 
-        if len(records) < 20:  # Check for minimum samples
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient data for retraining (need at least 20, got {len(records)})"
-            )
 
-        # Convert SQLAlchemy models to dictionary list
-        data = [{
-            'age': record.age,
-            'sex': record.sex,
-            'bmi': record.bmi,
-            'children': record.children,
-            'smoker': record.smoker,
-            'region': record.region,
-            'charges': record.charges
-        } for record in records]
-
-        # Create DataFrame
-        import pandas as pd
-        df = pd.DataFrame(data)
-
-        # Separate features and target
-        X = df.drop(columns=[TARGET_FEATURE])
-        y = df[TARGET_FEATURE]
-
-        logger.info(f"Separated features and target, shape: {X.shape}")
-
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
+def is_regression(candidate, current) -> bool:
+    """Whether the candidate's metrics are worse than the current model's beyond tolerance"""
+    if candidate['r2'] < current['r2'] - RETRAIN_SCHEDULE_CONFIG['max_r2_drop']:
+        return True
+    return candidate['mae'] > current['mae'] * (1 + RETRAIN_SCHEDULE_CONFIG['max_mae_increase'])
+
+
+def fit_and_evaluate(data, require_improvement: bool = False):
+    """
+    Run the CPU-bound part of retraining through the cached training
+    pipeline (clean, split, fit preprocessor, model search, evaluate) and
+    decide whether the new model is promoted.
+
+    Executed on the training executor, never on the event loop.
+
+    Args:
+        data: Training rows (DataFrame or list of row dictionaries)
+        require_improvement: Only promote the new model if it does not regress
+            against the currently served model on the same holdout set
+
+    Returns:
+        Dict[str, Any]: Metrics, sample counts, whether the model is promoted
+            and the pipeline result to pass to promote_model
+    """
+    # Cap the model search's worker processes so retraining does not starve
+    # the inference executor
+    search = TRAINING_CONFIG['search']
+    config = {**TRAINING_CONFIG, 'search': {**search, 'n_jobs': search['api_n_jobs']}}
+    result = run_pipeline(pd.DataFrame(data), config)
+    metrics = result['metrics'][result['model_type']]
+    split = result['split']
+
+    logger.info(
+        f"Retrained model ({result['model_type']}) metrics - "
+        f"R²: {metrics['r2']:.4f}, RMSE: {metrics['rmse']:.2f}"
+    )
+
+    # Compare against the served model on the same holdout before promoting
+    current = evaluate_current_model(split['X_test'], split['y_test']) if require_improvement else None
+    promoted = current is None or not is_regression(metrics, current)
+
+    if not promoted:
+        logger.warning(
+            f"Retrained model not promoted - R²: {metrics['r2']:.4f} vs {current['r2']:.4f}, "
+            f"MAE: {metrics['mae']:.2f} vs {current['mae']:.2f}"
         )
 
-        logger.info(f"Split data - Train: {len(X_train)}, Test: {len(X_test)}")
-
-        # Load preprocessing pipeline
-        preprocessor = load_preprocessor()
-        feature_order = NUMERICAL_FEATURES + CATEGORICAL_FEATURES
-
-        logger.info(f"Loaded preprocessing pipeline")
-
-        # Transform features using existing preprocessing pipeline
-        X_train_processed = preprocessor.transform(X_train[feature_order])
-        X_test_processed = preprocessor.transform(X_test[feature_order])
-
-        logger.info(f"Transform features using existing preprocessing pipeline")
-
-         # Train model
-        model = LinearRegression()
-        
-        model.fit(X_train_processed, y_train)
-        logger.info("Model retrained successfully")
-
-        # Evaluate model
-        y_pred = model.predict(X_test_processed)
-        
-        # Calculate metrics
-        r2 = r2_score(y_test, y_pred)
-        mse = mean_squared_error(y_test, y_pred)
-        mae = mean_absolute_error(y_test, y_pred)
-        rmse = np.sqrt(mse)
-
-        logger.info(f"Retrained model metrics - R²: {r2:.4f}, RMSE: {rmse:.2f}")
-
-        # Save new model
-        joblib.dump(model, MODEL_PATH)
-        logger.info(f"Model saved successfully to {MODEL_PATH}")
-
-        # Save metadata
-        model_meta = await save_model_metadata(
-            db=db,
-            model_type="LinearRegression",
-            r2_score=r2,
-            mse=mse,
-            mae=mae,
-            training_samples=len(X_train),
-            test_samples=len(X_test)
+    return {
+        'promoted': promoted,
+        'pipeline': result,
+        'model_type': result['model_type'],
+        'r2': metrics['r2'],
+        'mse': metrics['mse'],
+        'mae': metrics['mae'],
+        'rmse': metrics['rmse'],
+        'samples': result['samples']['cleaned'],
+        'training_samples': result['samples']['train'],
+        'test_samples': result['samples']['test']
+    }
+
+
+def promote_model(result, model_version: str):
+    """
+    Serve a retrained model: export the model and preprocessor tagged with
+    its version, archive it and set the drift reference profile.
+
+    Executed on the training executor, never on the event loop.
+
+    Args:
+        result: Pipeline result returned by fit_and_evaluate
+        model_version: Version live predictions of the model are tagged with
+    """
+    # Save the full pipeline for the prediction service, which feeds it raw
+    # features, and its refitted preprocessor for input validation
+    export_artifacts(result, model_version=model_version)
+    logger.info(f"Model saved successfully to {MODEL_PATH}")
+
+    # Keep a copy per version so historical records can be re-scored
+    archive_model(model_version)
+
+    # Build the drift reference profile from the training features and
+    # the new model's predicted charges
+    features = result['data'][FEATURE_COLUMNS]
+    reference_df = features.assign(**{
+        TARGET_FEATURE: result['model'].predict(features)
+    })
+    drift_monitor.set_reference(StreamingProfile.from_frame(reference_df))
+
+
+async def publish_model(db, result, data_watermark=None, executor=training_executor) -> str:
+    """
+    Serve a trained pipeline result: save its metadata, whose ID is the
+    version, then promote_model it. The metadata is removed again if the
+    model cannot be served.
+
+    Args:
+        db: Database session
+        result: Pipeline result (run_pipeline or fit_and_evaluate's ``pipeline``)
+        data_watermark: Snapshot of the training data the model was trained on
+        executor: Executor promote_model runs on (None runs it inline, for
+            command line tools)
+
+    Returns:
+        str: Version of the served model
+    """
+    scores = result['metrics'][result['model_type']]
+    model_meta = await save_model_metadata(
+        db=db,
+        model_type=result['model_type'],
+        r2_score=scores['r2'],
+        mse=scores['mse'],
+        mae=scores['mae'],
+        training_samples=result['samples']['train'],
+        test_samples=result['samples']['test'],
+        data_watermark=data_watermark
+    )
+
+    model_version = str(model_meta.id)
+    try:
+        if executor is None:
+            promote_model(result, model_version)
+        else:
+            await executor.run(promote_model, result, model_version)
+    except Exception:
+        await db.delete(model_meta)
+        await db.commit()
+        raise
+    return model_version
+
+
+def train_on_database(require_improvement: bool = False):
+    """
+    Load all training records and run fit_and_evaluate on them
+
+    Executed on the training executor, so reading the training rows (all
+    shards if storage is sharded) never blocks the event loop.
+
+    Args:
+        require_improvement: Passed to fit_and_evaluate
+
+    Returns:
+        Tuple[Dict[str, Any], Dict[str, Any]]: Result of fit_and_evaluate and
+            the data watermark of the rows it was trained on
+    """
+    df, data_watermark = load_database_snapshot()
+    logger.info(f"Retrieved {len(df)} training records")
+
+    if len(df) < 20:  # Check for minimum samples
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient data for retraining (need at least 20, got {len(df)})"
         )
-        
-        if not model_meta:
-            logger.warning("Failed to save model metadata")
+
+    return fit_and_evaluate(df, require_improvement), data_watermark
+
+
+async def retrain_model(db, require_improvement: bool = False):
+    """
+    Retrain the model on all training records and promote it
+
+    Args:
+        db: Database session
+        require_improvement: Keep the served model if the new one regresses
+
+    Returns:
+        RetrainResponse: Metrics of the new model and whether it was promoted
+    """
+    try:
+        # Load the training data and fit off the event loop
+        metrics, data_watermark = await training_executor.run(train_on_database, require_improvement)
+
+        model_version = None
+        if metrics['promoted']:
+            model_version = await publish_model(db, metrics['pipeline'], data_watermark)
+        else:
+            # Rejected retrains are recorded too (promoted=False), so the
+            # scheduler does not retrain on the same data again
+            await save_model_metadata(
+                db=db,
+                model_type=metrics['model_type'],
+                r2_score=metrics['r2'],
+                mse=metrics['mse'],
+                mae=metrics['mae'],
+                training_samples=metrics['training_samples'],
+                test_samples=metrics['test_samples'],
+                promoted=False,
+                data_watermark=data_watermark
+            )
 
         # Prepare response
         response_data = {
-            "message": "Model retrained successfully with new data",
-            "r2_score": round(r2, 4),
-            "rmse": round(rmse, 2),
-            "training_samples": len(df),
-            "test_samples": len(X_test),
+            "message": ("Model retrained successfully with new data" if metrics['promoted']
+                        else "Retrained model regressed and was not promoted"),
+            "promoted": metrics['promoted'],
+            "model_version": model_version,
+            "r2_score": round(metrics['r2'], 4),
+            "rmse": round(metrics['rmse'], 2),
+            "training_samples": metrics['samples'],
+            "test_samples": metrics['test_samples'],
             "timestamp": datetime.utcnow().isoformat() + "Z"
         }
         return RetrainResponse(**response_data)
@@ -0,0 +1,197 @@
+"""Automatic retraining scheduler for Medical Cost Prediction API"""
+
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from core.config import RETRAIN_SCHEDULE_CONFIG
+from database.models import InsuranceRecord, ModelMetadata
+from database.session import AsyncSessionLocal, shard_router
+from service.retrain import retrain_model
+from utils.logger import logger
+
+
+async def get_training_watermark(db) -> Tuple[Optional[datetime], int, Optional[datetime]]:
+    """
+    Find the training-data watermark of the latest retrain and count training rows added since
+
+    The latest ModelMetadata entry is the served model, or a newer retrain
+    that regressed and was not promoted (so its data is not retrained on
+    again). Its watermark is the data snapshot stored with it: the largest
+    training record ID of every shard when its training data was read, so
+    rows inserted while it was training are still counted as new. Entries
+    without a snapshot (or from another storage layout) fall back to their
+    creation time.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Tuple[Optional[datetime], int, Optional[datetime]]: Time of the
+            watermark (None if no model was ever recorded), the number of newer
+            training rows (summed over all shards if storage is sharded) and
+            the time of the rejected retrain the watermark comes from (None if
+            it is the served model's)
+    """
+    latest = (await db.execute(
+        select(ModelMetadata).order_by(ModelMetadata.id.desc()).limit(1)
+    )).scalar_one_or_none()
+
+    query = select(func.count()).select_from(InsuranceRecord).where(InsuranceRecord.is_training_data == True)
+    shard_count = shard_router.shard_count if shard_router.enabled else 1
+    last_ids = json.loads(latest.data_last_ids) if latest is not None and latest.data_last_ids else None
+
+    if last_ids is not None and latest.data_sharding == shard_router.mode and len(last_ids) == shard_count:
+        watermark = latest.data_loaded_at
+        shard_queries = [query.where(InsuranceRecord.id > last_id) for last_id in last_ids]
+    else:
+        watermark = latest.created_at if latest is not None else None
+        if watermark is not None:
+            query = query.where(InsuranceRecord.created_at > watermark)
+        shard_queries = [query] * shard_count
+
+    if shard_router.enabled:
+        async def count_shard(shard_db, index):
+            return (await shard_db.execute(shard_queries[index])).scalar()
+
+        new_rows = sum(await shard_router.gather(count_shard))
+    else:
+        new_rows = (await db.execute(shard_queries[0])).scalar()
+
+    last_rejected = latest.created_at if latest is not None and not latest.promoted else None
+    return watermark, new_rows, last_rejected
+
+
+def in_peak_hours(now: datetime, peak_hours: Optional[Tuple[int, int]]) -> bool:
+    """Whether a local time falls in the [start, end) peak window (may wrap past midnight)"""
+    if peak_hours is None:
+        return False
+    start, end = peak_hours
+    if start <= end:
+        return start <= now.hour < end
+    return now.hour >= start or now.hour < end
+
+
+class RetrainScheduler:
+    """
+    Periodically checks the training-data watermark and retrains in the background
+
+    Triggers are debounced, deferred outside the peak window, and the new
+    model is only promoted if it does not regress against the served one.
+    After a retrain that was not promoted, triggers only count training rows
+    added beyond that attempt (see get_training_watermark).
+    """
+
+    def __init__(self, config: Dict[str, Any] = RETRAIN_SCHEDULE_CONFIG, session_factory=AsyncSessionLocal):
+        self.config = config
+        self.session_factory = session_factory
+        self.last_check: Optional[datetime] = None
+        self.last_trigger: Optional[datetime] = None
+        self.last_trigger_reason: Optional[str] = None
+        self.last_result: Optional[str] = None
+        self.watermark: Optional[datetime] = None
+        self.new_rows: Optional[int] = None
+        self.last_rejected: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._retrain_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the periodic check loop (called from the app lifespan)"""
+        if not self.config['enabled']:
+            logger.info("Automatic retraining disabled")
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Automatic retraining enabled, checking every {self.config['check_interval_seconds']}s")
+
+    async def stop(self):
+        """Stop the check loop and any running retrain"""
+        for task in (self._task, self._retrain_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.config['check_interval_seconds'])
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"Error in retraining scheduler: {e}")
+
+    def trigger_reason(self, watermark: Optional[datetime], new_rows: int, now: datetime) -> Optional[str]:
+        """Why a retrain is due, or None if it is not"""
+        if new_rows >= self.config['min_new_rows']:
+            return f"{new_rows} new training rows"
+        if watermark is not None and new_rows > 0:
+            age_hours = (now - watermark).total_seconds() / 3600
+            if age_hours >= self.config['max_model_age_hours']:
+                return f"model is {age_hours:.0f}h old with {new_rows} new training rows"
+        return None
+
+    async def check(self) -> Optional[str]:
+        """
+        Evaluate the triggers once and start a background retrain if one is due
+
+        Returns:
+            Optional[str]: The trigger reason if a retrain was started
+        """
+        now = datetime.utcnow()
+        self.last_check = now
+
+        if self._retrain_task is not None and not self._retrain_task.done():
+            return None
+        if (self.last_trigger is not None
+                and (now - self.last_trigger).total_seconds() < self.config['debounce_seconds']):
+            return None
+
+        async with self.session_factory() as db:
+            self.watermark, self.new_rows, self.last_rejected = await get_training_watermark(db)
+
+        reason = self.trigger_reason(self.watermark, self.new_rows, now)
+        if reason is None:
+            return None
+        if in_peak_hours(datetime.now(), self.config['peak_hours']):
+            logger.info(f"Retrain due ({reason}) but deferred until after peak hours")
+            return None
+
+        logger.info(f"Automatic retrain triggered: {reason}")
+        self.last_trigger = now
+        self.last_trigger_reason = reason
+        self._retrain_task = asyncio.create_task(self._retrain())
+        return reason
+
+    async def _retrain(self):
+        async with self.session_factory() as db:
+            try:
+                response = await retrain_model(db, require_improvement=True)
+                self.last_result = response.message
+            except HTTPException as e:
+                self.last_result = f"failed: {e.detail}"
+            logger.info(f"Automatic retrain finished: {self.last_result}")
+
+    def status(self) -> Dict[str, Any]:
+        def iso(value: Optional[datetime]) -> Optional[str]:
+            return value.isoformat() + "Z" if value else None
+
+        return {
+            'enabled': self.config['enabled'],
+            'running': self._retrain_task is not None and not self._retrain_task.done(),
+            'last_check': iso(self.last_check),
+            'last_trigger': iso(self.last_trigger),
+            'last_trigger_reason': self.last_trigger_reason,
+            'last_result': self.last_result,
+            'watermark': iso(self.watermark),
+            'new_rows': self.new_rows,
+            'last_rejected': iso(self.last_rejected)
+        }
+
+
+# Default scheduler instance
+retrain_scheduler = RetrainScheduler()
@@ -0,0 +1,250 @@
+"""
+Opt-in per-request profiling for Medical Cost Prediction API
+
+When ``PROFILING_CONFIG['enabled']`` is set, ``install_profiling`` adds an
+ASGI middleware that profiles requests to the configured paths when they
+carry the profiling header or are sampled. Each profile is written to
+``PROFILING_CONFIG['directory']`` as:
+
+    <id>.prof   cProfile call tree (open with ``python -m pstats`` or snakeviz)
+    <id>.json   route, status, duration, SQL statement timings, top functions
+
+The directory is rotated to ``max_profiles`` entries. When profiling is
+disabled nothing is installed, so requests pay no overhead.
+
+The event-loop profiler is process-wide per thread, so only one request is
+profiled on the loop at a time (others pass through unprofiled), and its
+call tree can include other requests interleaved at await points. Work
+offloaded to the CPU executors is profiled in the worker thread and merged
+into the request's profile.
+"""
+
+import asyncio
+import cProfile
+import json
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.config import PROFILING_CONFIG
+from utils.logger import logger
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+
+# Only one cProfile profiler can be active on the event loop thread
+_loop_profiler_lock = threading.Lock()
+
+
+class RequestProfile:
+    """Call-tree and SQL timings collected for one request"""
+
+    def __init__(self, method: str, path: str):
+        self.id = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}_{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self.route = path
+        self.status_code = None
+        self.started_at = datetime.utcnow().isoformat() + "Z"
+        self.duration_ms = 0.0
+        self.profiler = cProfile.Profile()
+        self.worker_stats: List[pstats.Stats] = []
+        self.sql: List[Dict[str, Any]] = []
+        self.sql_count = 0
+        self.sql_total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def add_sql(self, statement: str, duration_ms: float):
+        with self._lock:
+            self.sql_count += 1
+            self.sql_total_ms += duration_ms
+            if len(self.sql) < PROFILING_CONFIG['max_sql_statements']:
+                self.sql.append({'statement': statement, 'duration_ms': round(duration_ms, 3)})
+
+    def add_worker_profile(self, profiler: cProfile.Profile):
+        with self._lock:
+            self.worker_stats.append(pstats.Stats(profiler))
+
+    def combined_stats(self) -> pstats.Stats:
+        stats = pstats.Stats(self.profiler)
+        for worker in self.worker_stats:
+            stats.add(worker)
+        return stats
+
+
+# ---------- storage -------------------------------------------------
+def _top_functions(stats: pstats.Stats, limit: int) -> List[Dict[str, Any]]:
+    rows = []
+    for (filename, line, name), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            'function': f"{name} ({filename}:{line})",
+            'calls': ncalls,
+            'tottime_ms': round(tottime * 1000, 3),
+            'cumtime_ms': round(cumtime * 1000, 3)
+        })
+    rows.sort(key=lambda row: row['cumtime_ms'], reverse=True)
+    return rows[:limit]
+
+
+def summary(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Profile metadata without the per-statement and per-function detail"""
+    return {key: value for key, value in data.items() if key not in ('sql', 'top_functions')}
+
+
+def save_profile(profile: RequestProfile, directory: Path = PROFILING_CONFIG['directory']):
+    """Write a profile and its metadata, then rotate the directory"""
+    directory.mkdir(parents=True, exist_ok=True)
+    stats = profile.combined_stats()
+    stats.dump_stats(directory / f"{profile.id}.prof")
+
+    data = {
+        'id': profile.id,
+        'route': profile.route,
+        'method': profile.method,
+        'path': profile.path,
+        'status_code': profile.status_code,
+        'started_at': profile.started_at,
+        'duration_ms': round(profile.duration_ms, 3),
+        'sql_count': profile.sql_count,
+        'sql_total_ms': round(profile.sql_total_ms, 3),
+        'sql': profile.sql,
+        'top_functions': _top_functions(stats, PROFILING_CONFIG['top_functions'])
+    }
+    with open(directory / f"{profile.id}.json", "w") as f:
+        json.dump(data, f)
+
+    # IDs start with a timestamp, so name order is age order
+    metadata_files = sorted(directory.glob("*.json"))
+    for old in metadata_files[:-PROFILING_CONFIG['max_profiles']]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".prof").unlink(missing_ok=True)
+
+    logger.info(f"Profile {profile.id} saved for {profile.method} {profile.route} ({profile.duration_ms:.1f} ms)")
+
+
+def list_profiles(directory: Path = PROFILING_CONFIG['directory']) -> List[Dict[str, Any]]:
+    """Metadata of all stored profiles, newest first"""
+    if not directory.exists():
+        return []
+    profiles = []
+    for path in sorted(directory.glob("*.json"), reverse=True):
+        try:
+            with open(path) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # rotated away or still being written
+    return profiles
+
+
+def profile_path(profile_id: str, directory: Path = PROFILING_CONFIG['directory']) -> Optional[Path]:
+    """Path of a stored .prof file, or None if it does not exist"""
+    if not re.fullmatch(r"[0-9T]+_[0-9a-f]{8}", profile_id):
+        return None
+    path = directory / f"{profile_id}.prof"
+    return path if path.exists() else None
+
+
+# ---------- hooks ---------------------------------------------------
+def profile_task(fn: Callable, *args, **kwargs) -> Any:
+    """Executor task wrapper: profile the task in its worker thread if the request is profiled"""
+    profile = _current_profile.get()
+    if profile is None:
+        return fn(*args, **kwargs)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn, *args, **kwargs)
+    finally:
+        profile.add_worker_profile(profiler)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    if profile is not None and conn.info.get('profile_query_start'):
+        started = conn.info['profile_query_start'].pop()
+        profile.add_sql(statement, (time.perf_counter() - started) * 1000)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles selected requests"""
+
+    def __init__(self, app):
+        self.app = app
+        self.paths = tuple(PROFILING_CONFIG['paths'])
+        self.header = PROFILING_CONFIG['header'].lower().encode()
+        self.sample_rate = PROFILING_CONFIG['sample_rate']
+
+    def _wanted(self, scope) -> bool:
+        if not scope['path'].startswith(self.paths):
+            return False
+        for name, value in scope['headers']:
+            if name == self.header:
+                return value not in (b"", b"0")
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+        if not _loop_profiler_lock.acquire(blocking=False):
+            logger.info(f"Profiler busy, not profiling {scope['method']} {scope['path']}")
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope['method'], scope['path'])
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                profile.status_code = message['status']
+            await send(message)
+
+        token = _current_profile.set(profile)
+        start = time.perf_counter()
+        profile.profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.profiler.disable()
+            profile.duration_ms = (time.perf_counter() - start) * 1000
+            _current_profile.reset(token)
+            _loop_profiler_lock.release()
+            route = scope.get('route')
+            profile.route = getattr(route, 'path', scope['path'])
+            try:
+                await asyncio.to_thread(save_profile, profile)
+            except OSError as e:
+                logger.error(f"Error saving profile {profile.id}: {e}")
+
+
+def install_profiling(app):
+    """
+    Install the profiling middleware, SQL timing listeners and executor hook
+
+    The SQL listeners are registered on the Engine class, so they cover the
+    main database and every shard engine (created lazily by ShardRouter).
+    Does nothing unless ``PROFILING_CONFIG['enabled']`` is set.
+    """
+    if not PROFILING_CONFIG['enabled']:
+        return
+
+    from core.executor import BoundedExecutor
+
+    app.add_middleware(ProfilingMiddleware)
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    BoundedExecutor.task_wrapper = staticmethod(profile_task)
+
+    logger.info(f"Request profiling enabled for {', '.join(PROFILING_CONFIG['paths'])}")
@@ -0,0 +1,125 @@
+"""
+Response encoding and content negotiation for Medical Cost Prediction API
+
+Prediction endpoints render through this module instead of FastAPI's
+default encoder. JSON is written with orjson, which serialises NumPy
+arrays natively, and batch results can also be returned as column arrays
+in MessagePack or Arrow IPC so large result sets never become per-row
+Python objects.
+"""
+
+from typing import Any, Dict, Iterable, Optional
+
+import msgpack
+import numpy as np
+import orjson
+from fastapi import HTTPException, Request, Response, status
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow IPC is only offered when pyarrow is installed
+    pa = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Formats offered for single-row and columnar (batch) responses, in order of preference
+ROW_MEDIA_TYPES = (JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE)
+COLUMNAR_MEDIA_TYPES = (JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE) + ((ARROW_MEDIA_TYPE,) if pa is not None else ())
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with orjson, including NumPy arrays"""
+    media_type = JSON_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def negotiate(request: Request, offered: Iterable[str]) -> str:
+    """
+    Pick the response media type from the request's Accept header
+
+    Args:
+        request: Incoming request
+        offered: Media types the endpoint can produce, preferred first
+
+    Returns:
+        str: Selected media type (the first offered type if Accept is absent or */*)
+
+    Raises:
+        HTTPException: 406 if none of the accepted types is offered
+    """
+    offered = list(offered)
+    accept = request.headers.get("accept", "")
+    if not accept.strip():
+        return offered[0]
+
+    candidates = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            candidates.append((-quality, position, media_type.lower()))
+
+    for _, _, media_type in sorted(candidates):
+        if media_type in ("*/*", "application/*"):
+            return offered[0]
+        if media_type in offered:
+            return media_type
+
+    raise HTTPException(
+        status_code=status.HTTP_406_NOT_ACCEPTABLE,
+        detail=f"Supported response types: {', '.join(offered)}"
+    )
+
+
+def render_row(media_type: str, payload: Dict[str, Any]) -> Response:
+    """Render a single-row response in a media type chosen by ``negotiate``"""
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return Response(msgpack.packb(payload), media_type=MSGPACK_MEDIA_TYPE)
+    return FastJSONResponse(payload)
+
+
+def render_columns(
+    media_type: str,
+    columns: Dict[str, np.ndarray],
+    metadata: Optional[Dict[str, Any]] = None
+) -> Response:
+    """
+    Render column arrays in a media type chosen by ``negotiate``
+
+    JSON embeds each column as an array next to ``metadata``. MessagePack
+    stores each column as ``{"dtype", "data"}`` with the raw little-endian
+    buffer, readable with ``np.frombuffer(data, dtype)``. Arrow IPC writes one
+    record batch with ``metadata`` as schema metadata.
+    """
+    metadata = metadata or {}
+    columns = {name: np.ascontiguousarray(values) for name, values in columns.items()}
+
+    if media_type == MSGPACK_MEDIA_TYPE:
+        packed = {}
+        for name, values in columns.items():
+            values = values.astype(values.dtype.newbyteorder('<'), copy=False)
+            packed[name] = {'dtype': values.dtype.str, 'data': values.tobytes()}
+        return Response(msgpack.packb({**metadata, 'columns': packed}), media_type=MSGPACK_MEDIA_TYPE)
+
+    if media_type == ARROW_MEDIA_TYPE:
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(values) for values in columns.values()],
+            names=list(columns)
+        )
+        schema = batch.schema.with_metadata({k: str(v) for k, v in metadata.items()})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, schema) as writer:
+            writer.write_batch(batch.replace_schema_metadata(schema.metadata))
+        return Response(sink.getvalue().to_pybytes(), media_type=ARROW_MEDIA_TYPE)
+
+    return FastJSONResponse({**metadata, **columns})